@@ -0,0 +1,31 @@
+"""
+agentsim：四个模拟脚本共用的向量化模拟引擎。
+
+学习规则在 models 中实现统一的 Model 接口；engine 是单个重复实验的共享热循环
+（可选 Numba 编译），batch 是同步推进多个重复实验的向量化版本，sweep 按 agent 数量扫描。
+脚本（agent_simulation_*.py）只是设置参数并调用这些函数的入口，命令行入口见 cli（python -m agentsim）。
+
+下面的名字在第一次访问时才导入对应的模块（NumPy、Numba 都不在导入包时加载），
+命令行入口的 --help 与 report 因此启动很快。
+"""
+import importlib
+
+_EXPORTS = {
+    "MODELS": ".models",
+    "Model": ".models",
+    "get_model": ".models",
+    "run_replica": ".engine",
+    "run_batch": ".batch",
+    "simulate_for_agent_sizes": ".batch",
+    "TraceRing": ".trace",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,127 @@
+"""
+自适应重复次数：不再固定 runs_per_size=20，而是按批追加重复实验，直到收敛轮次的
+均值与中位数的置信区间足够窄，或者用完计算预算。
+
+达到 max_rounds 仍未收敛的运行是右删失的：只知道 τ > max_rounds。
+  - 均值报告受限均值 E[min(τ, max_rounds)]（有删失时它只是 E[τ] 的下界），
+    置信区间用正态近似；
+  - 中位数用次序统计量的无分布置信区间，删失值排在所有已收敛值之后；
+    如果中位数本身落在删失部分（超过一半未收敛）则无法估计，报告为 None；
+  - 如果连中位数置信区间的下端都已删失，说明该单元格大概率超过一半不收敛，
+    再增加重复实验也估计不出中位数，提前停止（对应 README 表中的 "-"）。
+收敛恰好发生在第 max_rounds 轮的运行与未收敛的运行无法区分，保守地记为删失。
+"""
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from .batch import run_batch
+from .models import format_stats, get_model
+from .rng import root_seed
+
+
+def censored_summary(rounds, max_rounds, confidence=0.95):
+    """
+    对一组收敛轮次（未收敛的记为 max_rounds）给出删失感知的汇总：
+    {"runs", "censored", "mean", "mean_ci", "median", "median_ci"}。
+    区间端点为 inf 表示该端落在删失部分。
+    """
+    rounds = np.sort(np.asarray(rounds, dtype=float))
+    n = len(rounds)
+    censored = int((rounds >= max_rounds).sum())
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    mean = float(rounds.mean())
+    half = z * rounds.std(ddof=1) / math.sqrt(n) if n > 1 else math.inf
+    # 删失值可能比 max_rounds 大得多，受限均值的区间上端不能外推到 E[τ]
+    mean_ci = (float(mean - half), float(mean + half))
+
+    # 删失值视为 +inf
+    values = np.where(rounds >= max_rounds, math.inf, rounds)
+    median = float(np.median(values))
+    lo = max(int(math.floor(n / 2 - z * math.sqrt(n) / 2)), 1)
+    hi = min(int(math.ceil(n / 2 + z * math.sqrt(n) / 2)) + 1, n)
+    median_ci = (float(values[lo - 1]), float(values[hi - 1]))
+    return {
+        "runs": n,
+        "censored": censored,
+        "mean": mean,
+        "mean_ci": mean_ci,
+        "median": None if math.isinf(median) else median,
+        "median_ci": median_ci,
+    }
+
+
+def _relative_width(ci, estimate):
+    if estimate is None or not estimate or math.isinf(ci[1]):
+        return math.inf
+    return (ci[1] - ci[0]) / estimate
+
+
+def adaptive_runs(model, num_agents, max_rounds=100000, seed=None, rel_width=0.1, confidence=0.95,
+                  min_runs=20, batch_runs=20, max_runs=2000, budget_rounds=None, cache=None):
+    """
+    为一个 agent 数量追加重复实验（用批量引擎，每次追加 batch_runs 与已有次数一半中的较大者），直到均值与中位数置信区间的
+    相对宽度都不超过 rel_width，或重复实验达到 max_runs、累计模拟轮数达到 budget_rounds，
+    或可以断定中位数已删失。
+    重复实验编号从 0 连续增加，给定 seed 时结果可复现；cache 为可选的 ResultCache。
+    返回 censored_summary 的字典，外加 "stats"（最终统计量）与停止原因 "stopped"
+    （"precision"、"censored"、"max_runs" 或 "budget"）。
+    """
+    if isinstance(model, str):
+        model = get_model(model)
+    use_cache = cache is not None and seed is not None
+    seed = root_seed(seed)
+
+    def compute(start, stop):
+        rounds, state = run_batch(model, num_agents, stop - start, max_rounds=max_rounds, seed=seed,
+                                  first_replica=start)
+        return rounds, model.stats(state)
+
+    runs = min(min_runs, max_runs)
+    rounds = None
+    while True:
+        if use_cache:
+            rounds, stats = cache.extend(model, num_agents, max_rounds, seed, runs, compute)
+        elif rounds is None:
+            rounds, stats = compute(0, runs)
+        else:
+            more, more_stats = compute(len(rounds), runs)
+            rounds = np.concatenate((rounds, more))
+            stats = {label: np.concatenate((stats[label], values)) for label, values in more_stats.items()}
+        summary = censored_summary(rounds, max_rounds, confidence)
+        if (_relative_width(summary["mean_ci"], summary["mean"]) <= rel_width
+                and _relative_width(summary["median_ci"], summary["median"]) <= rel_width):
+            stopped = "precision"
+        elif math.isinf(summary["median_ci"][0]):
+            stopped = "censored"
+        elif runs >= max_runs:
+            stopped = "max_runs"
+        elif budget_rounds is not None and rounds.sum() >= budget_rounds:
+            stopped = "budget"
+        else:
+            runs = min(runs + max(batch_runs, runs // 2), max_runs)
+            continue
+        summary["stats"] = stats
+        summary["stopped"] = stopped
+        return summary
+
+
+def adaptive_simulate_for_agent_sizes(model, agent_sizes, max_rounds=100000, seed=None, cache=None, **options):
+    """
+    自适应版本的 simulate_for_agent_sizes：每个 agent 数量由 adaptive_runs 决定重复次数，
+    options 见 adaptive_runs。打印每个单元格的重复次数、删失次数、均值与中位数，
+    返回字典 {agent_size: adaptive_runs 的汇总}。
+    """
+    if isinstance(model, str):
+        model = get_model(model)
+    results = {}
+    for size in agent_sizes:
+        summary = adaptive_runs(model, size, max_rounds=max_rounds, seed=seed, cache=cache, **options)
+        results[size] = summary
+        median = "-" if summary["median"] is None else f"{summary['median']:.1f}"
+        print(f"Agent Size: {size}, Runs: {summary['runs']}, Censored: {summary['censored']}, "
+              f"Avg Rounds to Convergence: {summary['mean']:.1f}, Median Rounds: {median}, "
+              f"{format_stats(summary['stats'])}")
+    return results
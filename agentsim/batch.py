@@ -0,0 +1,141 @@
+"""
+批量模拟驱动：R 个重复实验同步推进，每一步所有尚未收敛的重复实验各走一轮。
+
+与脚本中的 run_simulation_convergence 语义相同：
+  - 每轮在每个重复实验中随机抽取一对不同的 agent 进行交互；
+  - 用 BatchConvergenceTracker 增量维护收敛计数，在首次达到共识的那一轮停止（首达时间，见 convergence）；
+  - 达到 max_rounds 仍未收敛的重复实验记为 max_rounds；
+  - 收敛时间是重尾分布，多数轮次里只剩少数几行还在运行，而向量化的一步不论几行都有约 50–70 µs 的
+    固定开销。活跃行数不超过 TAIL_ROWS 时，剩下的重复实验连同随机数流的位置交给单重复实验的热循环
+    （engine.finish_row）逐个推进，结果逐位不变。
+"""
+import numpy as np
+
+from .convergence import BatchConvergenceTracker
+from .engine import finish_row, resolve_backend
+from .models import get_model
+from .rng import BLOCK_ROUNDS, ReplicaStream, root_seed
+from .sweep import summarize
+
+# 每次从各重复实验的随机数流中取出的随机数总量上限（元素个数），控制大 runs 时的内存
+CHUNK_ELEMENTS = 1 << 22
+
+# 按后端区分的交接行数。纯 Python 的标量循环每轮约 1–3 µs，向量化的一步约 55 µs 外加每行约 0.4 µs，
+# 约 32 行时两者持平；Numba 编译的标量循环每轮约 0.2 µs，低于任何批量大小下向量化每行的开销，
+# 所有行一开始就交给标量循环
+TAIL_ROWS = {"python": 32, "numba": float("inf")}
+
+
+def run_batch(model, num_agents, runs, max_rounds=100000, seed=None, trace=None, first_replica=0, replicas=None,
+              graph=None, backend=None):
+    """
+    对同一 agent 数量同时运行 runs 个重复实验。
+    model 可以是模型名或 models 中的模型实例。
+    第 k 行使用重复实验编号 first_replica + k 的随机数流（见 rng.ReplicaStream），
+    因此结果与 runs 的大小无关，可以单独重放，也与脚本的逐 agent 实现逐位一致。
+    replicas 给出每一行的重复实验编号（长度为 runs）时覆盖 first_replica，
+    参数网格扫描用它让各网格点共用同一组随机数流。
+    graph 为可选的 graph.CSRGraph，所有重复实验在同一张交互图上运行。
+    trace 为可选的 TraceRing.for_model(model, runs, num_agents, depth)，每轮交互后
+    写入两个 agent 的 model.trace_field，只保留最近 depth 条。
+    backend 为交接后标量热循环的后端（见 engine.resolve_backend），也决定交接的行数 TAIL_ROWS。
+    返回 (rounds, state)：rounds 为形状 (runs,) 的收敛轮次数组，
+    state 为最终的种群状态（各数组形状为 (runs, num_agents)）。
+    """
+    if isinstance(model, str):
+        model = get_model(model)
+    if trace is not None:
+        trace.check(model, runs, num_agents)
+    seed = root_seed(seed)
+    if replicas is None:
+        replicas = range(first_replica, first_replica + runs)
+    streams = [ReplicaStream(model.name, num_agents, model.n_uniforms, seed, int(replica), graph)
+               for replica in replicas]
+    state = model.init_state(runs, num_agents)
+    tracker = BatchConvergenceTracker(model.votes(state))
+    rounds = np.full(runs, max_rounds, dtype=np.int64)
+    active = np.arange(runs)
+    offsets = active * num_agents
+    chunk_rounds = max(1, min(BLOCK_ROUNDS, CHUNK_ELEMENTS // (runs * (model.n_uniforms + 2))))
+    first = np.zeros((chunk_rounds, runs), dtype=np.int64)
+    second = np.zeros((chunk_rounds, runs), dtype=np.int64)
+    uniforms = np.zeros((chunk_rounds, model.n_uniforms, runs))
+
+    tail_rows = TAIL_ROWS[resolve_backend(backend)]
+    t = 0
+    block = pending = 0
+    while t < max_rounds and active.size > tail_rows:
+        block = min(chunk_rounds, max_rounds - t)
+        # 只从仍在运行的重复实验的流中取随机数
+        for r in active:
+            f, g, u = streams[r].take(block)
+            first[:block, r] = f
+            second[:block, r] = g
+            uniforms[:block, :, r] = u
+        for k in range(block):
+            t += 1
+            pair = np.stack((offsets + first[k, active], offsets + second[k, active]))
+            before = model.votes(state, pair)
+            model.step(state, pair, uniforms[k][:, active])
+            tracker.update(active, before, model.votes(state, pair))
+            if trace is not None:
+                trace.record(pair, state[model.trace_field].reshape(-1)[pair])
+            done = tracker.converged(active)
+            if done.any():
+                rounds[active[done]] = t
+                active = active[~done]
+                offsets = active * num_agents
+                if active.size <= tail_rows:
+                    break
+        # 本块中已经取出、还没有执行的轮次，交给标量循环接着执行
+        pending = block - (k + 1)
+
+    rest = slice(block - pending, block)
+    for r in active:
+        rounds[r] = finish_row(model, model.row(state, r), (tracker.blue[r], tracker.red[r]), streams[r], t,
+                               max_rounds, (np.ascontiguousarray(first[rest, r]),
+                                            np.ascontiguousarray(second[rest, r]),
+                                            np.ascontiguousarray(uniforms[rest, :, r])),
+                               model.params(r), backend,
+                               None if trace is None else (trace.values[r], trace.count[r]))
+    return rounds, state
+
+
+def simulate_for_agent_sizes(model, agent_sizes, runs_per_size=20, max_rounds=100000, seed=None, cache=None):
+    """
+    批量版本的 simulate_for_agent_sizes：每个 agent 数量的所有重复实验一次性推进。
+    cache 为可选的 ResultCache（需给定 seed）：只批量运行缓存中还没有的重复实验。
+    返回字典 {agent_size: avg_rounds_to_convergence}，并打印与脚本相同的汇总信息。
+    """
+    if isinstance(model, str):
+        model = get_model(model)
+    use_cache = cache is not None and seed is not None
+    # 各 agent 数量共用同一个根种子，流已经按 agent 数量区分
+    seed = root_seed(seed)
+
+    def cells():
+        for size in agent_sizes:
+            def compute(start, stop):
+                rounds, state = run_batch(model, size, stop - start, max_rounds=max_rounds, seed=seed,
+                                          first_replica=start)
+                return rounds, model.stats(state)
+
+            if use_cache:
+                yield size, cache.extend(model, size, max_rounds, seed, runs_per_size, compute)
+            else:
+                yield size, compute(0, runs_per_size)
+
+    # 逐个 agent 数量计算并打印
+    return summarize(cells(), max_rounds)
+
+
+def main():
+    # 与脚本相同的 agent 数量列表，四个模型依次运行
+    agent_sizes = [2, 4, 6, 8, 10, 16, 20, 50, 100, 200]
+    for name in ("history", "history_withoutSignal", "reward", "reward_withoutSignal"):
+        print(f"== {name} ==")
+        simulate_for_agent_sizes(name, agent_sizes, runs_per_size=20, max_rounds=100000)
+
+
+if __name__ == '__main__':
+    main()
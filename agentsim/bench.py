@@ -0,0 +1,193 @@
+"""
+性能基准：测量各模型、各 agent 数量、各引擎的吞吐量与扫描耗时，写成 JSON，并可与基线比较。
+
+  - throughput：在 max_rounds 较小的截断下反复运行，统计每秒模拟的交互轮数
+    （批量引擎为所有重复实验的轮数之和），每项至少运行 min_time 秒；
+  - sweep：用固定的小扫描（agent 数量、重复次数、max_rounds）测量端到端耗时，
+    即重新生成 README 表中一列所需的时间；
+  - 每项再单独运行一次（不计时）用 tracemalloc 记录 Python 与 NumPy 分配的峰值内存；
+  - 引擎："python"、"numba"（单重复实验热循环的两个后端，见 engine）与 "batch"（批量引擎）；
+  - --baseline 给出旧的 JSON 时，按 (kind, model, n, engine) 对齐比较，吞吐量下降或耗时增加
+    超过 threshold 的记为回归，命令返回非零退出码。
+
+    python -m agentsim.bench --output bench.json
+    python -m agentsim.bench --baseline bench.json --threshold 0.1
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from . import batch, sweep
+from .engine import run_replica
+from .jit import HAVE_NUMBA
+
+MODEL_NAMES = ("history", "history_withoutSignal", "reward", "reward_withoutSignal")
+DEFAULT_SIZES = (2, 10, 50, 200, 1000)
+SWEEP_SIZES = (2, 4, 6, 8, 10, 16, 20)
+
+
+def default_engines():
+    return ("python", "numba", "batch") if HAVE_NUMBA else ("python", "batch")
+
+
+@contextlib.contextmanager
+def _backend(engine):
+    # sweep 的工作进程通过环境变量选择后端
+    old = os.environ.get("AGENTSIM_BACKEND")
+    if engine != "batch":
+        os.environ["AGENTSIM_BACKEND"] = engine
+    try:
+        yield
+    finally:
+        if old is None:
+            os.environ.pop("AGENTSIM_BACKEND", None)
+        else:
+            os.environ["AGENTSIM_BACKEND"] = old
+
+
+def _simulate(model, engine, num_agents, max_rounds, replica, batch_runs):
+    """运行一次，返回模拟的交互轮数。"""
+    if engine == "batch":
+        rounds, _ = batch.run_batch(model, num_agents, batch_runs, max_rounds=max_rounds, seed=0,
+                                    first_replica=replica * batch_runs)
+        return int(rounds.sum())
+    rounds, _ = run_replica(model, num_agents, max_rounds=max_rounds, seed=0, replica=replica, backend=engine)
+    return rounds
+
+
+def _peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure_throughput(model, engine, num_agents, max_rounds=20000, min_time=1.0, batch_runs=64):
+    # 先运行一次预热（Numba 编译、导入等不计入）
+    _simulate(model, engine, num_agents, min(max_rounds, 100), 0, batch_runs)
+    total = 0
+    replica = 0
+    start = time.perf_counter()
+    while True:
+        total += _simulate(model, engine, num_agents, max_rounds, replica, batch_runs)
+        replica += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+    peak = _peak_memory(lambda: _simulate(model, engine, num_agents, max_rounds, 0, batch_runs))
+    return {"kind": "throughput", "model": model, "n": num_agents, "engine": engine,
+            "rounds": total, "seconds": elapsed, "rounds_per_sec": total / elapsed, "peak_bytes": peak}
+
+
+def measure_sweep(model, engine, sizes=SWEEP_SIZES, runs_per_size=20, max_rounds=20000):
+    def run():
+        # 扫描会打印每个 agent 数量的汇总，基准中不需要
+        with contextlib.redirect_stdout(io.StringIO()), _backend(engine):
+            if engine == "batch":
+                batch.simulate_for_agent_sizes(model, sizes, runs_per_size, max_rounds, seed=0)
+            else:
+                sweep.simulate_for_agent_sizes(model, sizes, runs_per_size, max_rounds, seed=0)
+
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    return {"kind": "sweep", "model": model, "n": max(sizes), "engine": engine, "sizes": list(sizes),
+            "runs_per_size": runs_per_size, "max_rounds": max_rounds, "seconds": elapsed,
+            "peak_bytes": _peak_memory(run)}
+
+
+def environment():
+    info = {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "numba": None, "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    if HAVE_NUMBA:
+        import numba
+        info["numba"] = numba.__version__
+    return info
+
+
+def _key(entry):
+    return entry["kind"], entry["model"], entry["n"], entry["engine"]
+
+
+def compare(results, baseline, threshold=0.1):
+    """
+    与基线逐项比较，返回 [(entry, ratio, regressed)]。
+    ratio 为“新 / 旧”的速度比（吞吐量之比，或耗时之比的倒数），小于 1 - threshold 记为回归。
+    """
+    old = {_key(entry): entry for entry in baseline["results"]}
+    report = []
+    for entry in results["results"]:
+        before = old.get(_key(entry))
+        if before is None:
+            continue
+        if entry["kind"] == "throughput":
+            ratio = entry["rounds_per_sec"] / before["rounds_per_sec"]
+        else:
+            ratio = before["seconds"] / entry["seconds"]
+        report.append((entry, ratio, ratio < 1 - threshold))
+    return report
+
+
+def run(models=MODEL_NAMES, sizes=DEFAULT_SIZES, engines=None, min_time=1.0, max_rounds=20000,
+        sweep_runs=20, sweep_max_rounds=20000, log=print):
+    engines = engines or default_engines()
+    results = []
+    for model in models:
+        for engine in engines:
+            for n in sizes:
+                entry = measure_throughput(model, engine, n, max_rounds=max_rounds, min_time=min_time)
+                log(f"{model:22s} {engine:7s} N={n:<6d} {entry['rounds_per_sec']:12.0f} rounds/s  "
+                    f"peak {entry['peak_bytes'] / 2**20:7.1f} MiB")
+                results.append(entry)
+            if sweep_runs:
+                entry = measure_sweep(model, engine, runs_per_size=sweep_runs, max_rounds=sweep_max_rounds)
+                log(f"{model:22s} {engine:7s} sweep {entry['seconds']:10.2f} s")
+                results.append(entry)
+    return {"environment": environment(), "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m agentsim.bench", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--models", nargs="+", default=list(MODEL_NAMES), choices=MODEL_NAMES)
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--engines", nargs="+", choices=("python", "numba", "batch"))
+    parser.add_argument("--min-time", type=float, default=1.0, help="每项吞吐量测量的最短时间（秒）")
+    parser.add_argument("--max-rounds", type=int, default=20000, help="吞吐量测量中每次运行的轮数上限")
+    parser.add_argument("--sweep-runs", type=int, default=20, help="扫描的每个 agent 数量的重复次数，0 表示跳过")
+    parser.add_argument("--sweep-max-rounds", type=int, default=20000)
+    parser.add_argument("--output", help="结果 JSON 文件")
+    parser.add_argument("--baseline", help="与之比较的旧结果 JSON 文件")
+    parser.add_argument("--threshold", type=float, default=0.1, help="判定回归的相对变慢幅度")
+    args = parser.parse_args(argv)
+
+    results = run(args.models, args.sizes, args.engines, args.min_time, args.max_rounds,
+                  args.sweep_runs, args.sweep_max_rounds)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = 0
+    for entry, ratio, regressed in compare(results, baseline, args.threshold):
+        flag = "REGRESSION" if regressed else ""
+        print(f"{entry['kind']:10s} {entry['model']:22s} {entry['engine']:7s} N={entry['n']:<6d} "
+              f"{ratio:6.2f}x {flag}")
+        regressions += regressed
+    print(f"{regressions} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
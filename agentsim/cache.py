@@ -0,0 +1,141 @@
+"""
+按内容寻址的结果缓存：(模型, 参数, agent 数量, max_rounds, seed) 对应一个“单元格”。
+
+  - 键是这些量（以及 CACHE_VERSION）的 SHA-256，参数取自模型实例的属性
+    （ALPHA、BETA、PSEUDO_COUNT），修改脚本中的常量后自然落到新的单元格；
+  - 每个单元格是一个 .npz 文件，按列存放：rounds 为各重复实验的收敛轮次，
+    stat0、stat1 …… 为各重复实验每个 agent 的最终统计量（形状 (runs, num_agents)），
+    labels 为对应的标签；
+  - 重复实验编号从 0 开始连续存放。同一 seed 下第 k 个重复实验的随机数流是确定的，
+    所以从 20 次增加到 100 次时只需计算第 20–99 次，前 20 次直接复用；
+  - seed 为 None 时每次调用都用新的随机熵，不读写缓存；
+  - 超过 max_bytes 或 max_age（秒）时按最近访问时间淘汰最旧的单元格。
+"""
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+# 随机数流或模型更新顺序改变时增加版本号，使旧结果失效
+CACHE_VERSION = 1
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "agentsim")
+
+
+def cache_key(model, num_agents, max_rounds, seed):
+    params = {name: float(value) for name, value in sorted(vars(model).items())}
+    payload = json.dumps({
+        "version": CACHE_VERSION,
+        "model": model.name,
+        "params": params,
+        "num_agents": int(num_agents),
+        "max_rounds": int(max_rounds),
+        "seed": int(seed),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    磁盘上的结果缓存。
+    path 默认为 ~/.cache/agentsim（可用环境变量 AGENTSIM_CACHE 覆盖）；
+    max_bytes、max_age 为 None 时不按该条件淘汰。
+    """
+
+    def __init__(self, path=None, max_bytes=None, max_age=None):
+        self.path = path or os.environ.get("AGENTSIM_CACHE", DEFAULT_DIR)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key + ".npz")
+
+    def load(self, model, num_agents, max_rounds, seed, runs=None):
+        """
+        返回已缓存的前 runs 个重复实验 (rounds, stats)（runs 为 None 时全部返回），
+        stats 为 {标签: (k, num_agents) 数组}；没有缓存时返回 None。
+        """
+        if seed is None:
+            return None
+        path = self._file(cache_key(model, num_agents, max_rounds, seed))
+        try:
+            with np.load(path) as data:
+                rounds = data["rounds"][:runs]
+                stats = {str(label): data[f"stat{k}"][:runs] for k, label in enumerate(data["labels"])}
+        except FileNotFoundError:
+            return None
+        # 访问时间用于按“最近使用”淘汰
+        os.utime(path)
+        return rounds, stats
+
+    def store(self, model, num_agents, max_rounds, seed, rounds, stats):
+        """保存重复实验 0 … len(rounds)-1 的结果，覆盖该单元格中较短的旧记录。"""
+        if seed is None:
+            return
+        path = self._file(cache_key(model, num_agents, max_rounds, seed))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        labels = list(stats)
+        columns = {f"stat{k}": np.asarray(stats[label]) for k, label in enumerate(labels)}
+        # 先写临时文件再原子替换，避免并行写入或中断留下半个文件
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, rounds=np.asarray(rounds, dtype=np.int64), labels=np.array(labels), **columns)
+        os.replace(tmp, path)
+        self.evict()
+
+    def extend(self, model, num_agents, max_rounds, seed, runs, compute):
+        """
+        返回前 runs 个重复实验的 (rounds, stats)。
+        缺少的重复实验 k … runs-1 由 compute(k, runs) 计算（返回同样格式的 (rounds, stats)），
+        与已缓存的部分拼接后写回。
+        """
+        cached = self.load(model, num_agents, max_rounds, seed)
+        have = 0 if cached is None else len(cached[0])
+        if have >= runs:
+            rounds, stats = cached
+            return rounds[:runs], {label: values[:runs] for label, values in stats.items()}
+        rounds, stats = compute(have, runs)
+        if cached is not None:
+            rounds = np.concatenate((cached[0], rounds))
+            stats = {label: np.concatenate((cached[1][label], values)) for label, values in stats.items()}
+        self.store(model, num_agents, max_rounds, seed, rounds, stats)
+        return rounds, stats
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                if name.endswith(".npz"):
+                    path = os.path.join(root, name)
+                    st = os.stat(path)
+                    entries.append((st.st_mtime, st.st_size, path))
+        return sorted(entries)
+
+    def size(self):
+        """缓存占用的字节数。"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """删除超过 max_age 的单元格，再按最近访问时间从旧到新删除，直到不超过 max_bytes。"""
+        if self.max_bytes is None and self.max_age is None:
+            return
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        for mtime, size, path in entries:
+            too_old = self.max_age is not None and now - mtime > self.max_age
+            too_big = self.max_bytes is not None and total > self.max_bytes
+            if not (too_old or too_big):
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for _, _, path in self._entries():
+            os.remove(path)
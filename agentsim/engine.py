@@ -0,0 +1,277 @@
+"""
+单个重复实验的共享热循环。
+
+所有学习规则都通过同一个循环 _run_rounds 推进：每轮取出配对下标与均匀随机数，
+调用规则的 kernel，并用两个 agent 交互前后的 vote 增量维护收敛计数。
+两种后端运行同一份源码：
+  - "numba"：把 kernel、vote 与循环一起编译为机器码（需要安装 Numba）；
+  - "python"：纯 Python，状态转换为列表后逐轮执行。
+backend=None 时取环境变量 AGENTSIM_BACKEND，未设置时有 Numba 就用 Numba。
+"""
+import os
+
+import numpy as np
+
+from . import checkpoint
+from .jit import HAVE_NUMBA, numba
+from .models import get_model
+from .rng import BLOCK_ROUNDS, ReplicaStream, root_seed
+
+BACKENDS = ("numba", "python")
+
+_compiled = {}
+
+
+def _run_rounds(kernel, vote, s, params, first, second, uniforms, counts, num_agents,
+                trace_src, trace_values, trace_count):
+    """
+    执行 len(first) 轮交互，返回收敛发生在第几轮（从 1 开始），未收敛返回 -1。
+    counts = [投 Blue 的 agent 数, 投 Red 的 agent 数]，原地更新。
+    trace_values 非空时把 trace_src 中两个 agent 的新值写入环形缓冲区。
+    """
+    depth = trace_values.shape[1] if len(trace_values) else 0
+    for k in range(len(first)):
+        i = first[k]
+        j = second[k]
+        old_i = vote(s, i)
+        old_j = vote(s, j)
+        kernel(s, i, j, uniforms[k], params)
+        new_i = vote(s, i)
+        new_j = vote(s, j)
+        counts[0] += (new_i == 1) + (new_j == 1) - (old_i == 1) - (old_j == 1)
+        counts[1] += (new_i == -1) + (new_j == -1) - (old_i == -1) - (old_j == -1)
+        if depth:
+            trace_values[i, trace_count[i] % depth] = trace_src[i]
+            trace_values[j, trace_count[j] % depth] = trace_src[j]
+            trace_count[i] += 1
+            trace_count[j] += 1
+        if counts[0] == num_agents or counts[1] == num_agents:
+            return k + 1
+    return -1
+
+
+def _run_rounds_probed(kernel, vote, s, params, first, second, uniforms, counts, num_agents,
+                       trace_src, trace_values, trace_count, probe, round0, snapshot):
+    """
+    与 _run_rounds 相同的逐轮更新，另外统计事件、分阶段计时，
+    并在 probe.next_sample 给出的轮次与收敛的那一轮调用 snapshot(轮次, 是否收敛) 发送快照
+    （round0 为本块之前已经完成的轮数）。
+    只在传入 instrument.Probe 时使用，始终以纯 Python 运行。
+    """
+    depth = trace_values.shape[1] if len(trace_values) else 0
+    timers = probe.timers
+    clock = probe.clock
+    observing = bool(probe.observers)
+    next_at = probe.next_sample(round0) if observing else -1
+    for k in range(len(first)):
+        i = first[k]
+        j = second[k]
+        t0 = clock()
+        old_i = vote(s, i)
+        old_j = vote(s, j)
+        t1 = clock()
+        events = kernel(s, i, j, uniforms[k], params)
+        t2 = clock()
+        new_i = vote(s, i)
+        new_j = vote(s, j)
+        counts[0] += (new_i == 1) + (new_j == 1) - (old_i == 1) - (old_j == 1)
+        counts[1] += (new_i == -1) + (new_j == -1) - (old_i == -1) - (old_j == -1)
+        converged = counts[0] == num_agents or counts[1] == num_agents
+        t3 = clock()
+        timers["interaction"] += t2 - t1
+        timers["convergence"] += (t1 - t0) + (t3 - t2)
+        probe.count(events)
+        if depth:
+            trace_values[i, trace_count[i] % depth] = trace_src[i]
+            trace_values[j, trace_count[j] % depth] = trace_src[j]
+            trace_count[i] += 1
+            trace_count[j] += 1
+        if observing and (converged or round0 + k + 1 == next_at):
+            snapshot(round0 + k + 1, converged)
+            next_at = probe.next_sample(round0 + k + 1)
+            timers["observers"] += clock() - t3
+        if converged:
+            return k + 1
+    return -1
+
+
+def _numba_loop(model):
+    """按 (kernel, vote) 缓存编译后的函数。"""
+    key = (model.kernel, model.vote)
+    if key not in _compiled:
+        njit = numba.njit(cache=True)
+        _compiled[key] = (njit(_run_rounds), njit(model.kernel), njit(model.vote))
+    return _compiled[key]
+
+
+def resolve_backend(backend):
+    """backend 为 None 时取环境变量 AGENTSIM_BACKEND，未设置时有 Numba 就用 Numba。"""
+    if backend is None:
+        backend = os.environ.get("AGENTSIM_BACKEND")
+    if backend is None:
+        return "numba" if HAVE_NUMBA else "python"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "numba" and not HAVE_NUMBA:
+        raise ValueError("backend 'numba' requested but numba is not installed")
+    return backend
+
+
+def _snapshot(path, config, rounds, stream, arrays, s, fields, trace):
+    # 纯 Python 后端的状态在列表里，写快照时转换为数组
+    values = {f"state_{name}": np.asarray(column, dtype=array.dtype)
+              for name, column, array in zip(fields, s, arrays)}
+    if trace is not None:
+        values["trace_values"] = trace.values
+        values["trace_count"] = trace.count
+    checkpoint.save(path, {"config": config, "rounds": rounds, "stream": stream.get_state()}, values)
+
+
+def run_replica(model, num_agents, max_rounds=100000, seed=None, replica=0, trace=None, backend=None,
+                checkpoint_path=None, checkpoint_interval=checkpoint.DEFAULT_INTERVAL, probe=None, graph=None):
+    """
+    运行单个重复实验，直到全局收敛或达到 max_rounds。
+    model 可以是模型名或 models 中的模型实例；随机数来自
+    (模型, num_agents, seed, replica) 确定的流，与批量引擎的同一行逐位一致。
+    trace 为可选的 TraceRing.for_model(model, 1, num_agents, depth)。
+    checkpoint_path 不为 None 时每隔 checkpoint_interval 秒把种群状态、随机数流位置与轮次写入该文件；
+    文件已存在时从快照继续（seed 为 None 时沿用快照中的根种子），运行结束后删除快照。
+    probe 为可选的 instrument.Probe：开启计时、事件计数与快照回调（此时总是用纯 Python 后端）。
+    graph 为可选的 graph.CSRGraph：交互对从图上抽取，而不是充分混合。
+    返回 (rounds, state)：state 为 {字段名: 形状 (num_agents,) 的数组}。
+    """
+    if isinstance(model, str):
+        model = get_model(model)
+    backend = resolve_backend(backend)
+    if trace is not None:
+        trace.check(model, 1, num_agents)
+    resumed = checkpoint.load(checkpoint_path) if checkpoint_path else None
+    config = dict(checkpoint.model_config(model), num_agents=num_agents, max_rounds=max_rounds,
+                  seed=seed, replica=replica)
+    if resumed is not None:
+        checkpoint.check_config(resumed[0], config, checkpoint_path)
+        seed = resumed[0]["config"]["seed"]
+    config["seed"] = seed = root_seed(seed)
+    stream = ReplicaStream(model.name, num_agents, model.n_uniforms, seed, replica, graph)
+    state = {name: values[0] for name, values in model.init_state(1, num_agents).items()}
+    arrays = tuple(state[name] for name in model.fields)
+    rounds = 0
+    if resumed is not None:
+        meta, saved = resumed
+        for name in model.fields:
+            state[name][:] = saved[f"state_{name}"]
+        if trace is not None:
+            trace.values[...] = saved["trace_values"]
+            trace.count[...] = saved["trace_count"]
+        stream.set_state(meta["stream"])
+        rounds = meta["rounds"]
+    params = model.params()
+    counts = np.zeros(2, dtype=np.int64)
+    for agent in range(num_agents):
+        v = model.vote(arrays, agent)
+        counts[0] += v == 1
+        counts[1] += v == -1
+    if trace is not None:
+        trace_values, trace_count = trace.values[0], trace.count[0]
+        trace_src = state[model.trace_field]
+    else:
+        trace_values = np.zeros((0, 0))
+        trace_count = np.zeros(0, dtype=np.int64)
+        trace_src = arrays[0]
+
+    if probe is not None:
+        backend = "python"
+    if backend == "numba":
+        loop, kernel, vote = _numba_loop(model)
+        s = arrays
+    else:
+        loop, kernel, vote = _run_rounds, model.kernel, model.vote
+        # 纯 Python 下逐元素访问列表比访问 NumPy 数组快得多
+        s = tuple(values.tolist() for values in arrays)
+        if trace is not None:
+            trace_src = s[model.fields.index(model.trace_field)]
+        counts = counts.tolist()
+
+    if probe is not None:
+        def snapshot(t, converged):
+            probe.emit({"round": t, "blue": counts[0], "red": counts[1], "converged": converged,
+                        "counters": dict(probe.counters),
+                        "state": {name: np.asarray(column, dtype=array.dtype)
+                                  for name, column, array in zip(model.fields, s, arrays)}})
+
+    timer = checkpoint.Timer(checkpoint_interval) if checkpoint_path else None
+    while rounds < max_rounds:
+        block = min(BLOCK_ROUNDS, max_rounds - rounds)
+        if probe is not None:
+            t0 = probe.clock()
+        first, second, uniforms = stream.take(block)
+        if backend == "python":
+            first, second, uniforms = first.tolist(), second.tolist(), uniforms.tolist()
+        if probe is None:
+            done = loop(kernel, vote, s, params, first, second, uniforms, counts, num_agents,
+                        trace_src, trace_values, trace_count)
+        else:
+            probe.timers["pairing"] += probe.clock() - t0
+            done = _run_rounds_probed(kernel, vote, s, params, first, second, uniforms, counts, num_agents,
+                                      trace_src, trace_values, trace_count, probe, rounds, snapshot)
+        if done > 0:
+            rounds += done
+            break
+        rounds += block
+        if timer is not None and timer.due():
+            _snapshot(checkpoint_path, config, rounds, stream, arrays, s, model.fields, trace)
+
+    if backend == "python":
+        for values, updated in zip(arrays, s):
+            values[:] = updated
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return rounds, state
+
+
+def finish_row(model, row, counts, stream, rounds, max_rounds, pending, params, backend=None, trace=None):
+    """
+    接手批量引擎中还没有收敛的一个重复实验，用与 run_replica 相同的热循环推进到收敛或 max_rounds。
+    row 为按 fields 排列的一维状态视图（原地更新），counts 为 (投 Blue 的 agent 数, 投 Red 的 agent 数)，
+    stream 为它的随机数流，rounds 为已经完成的轮数，pending = (first, second, uniforms)
+    为已从流中取出、还没有执行的轮次；trace 为可选的 (values, count)，即它在 TraceRing 中的缓冲区。
+    返回收敛轮次（未收敛为 max_rounds）。
+    """
+    backend = resolve_backend(backend)
+    num_agents = len(row[0])
+    counts = np.array(counts, dtype=np.int64)
+    if trace is not None:
+        trace_values, trace_count = trace
+        trace_src = row[model.fields.index(model.trace_field)]
+    else:
+        trace_values = np.zeros((0, 0))
+        trace_count = np.zeros(0, dtype=np.int64)
+        trace_src = row[0]
+    if backend == "numba":
+        loop, kernel, vote = _numba_loop(model)
+        s = row
+    else:
+        loop, kernel, vote = _run_rounds, model.kernel, model.vote
+        s = tuple(values.tolist() for values in row)
+        if trace is not None:
+            trace_src = s[model.fields.index(model.trace_field)]
+        counts = counts.tolist()
+
+    first, second, uniforms = pending
+    while True:
+        if backend == "python":
+            first, second, uniforms = first.tolist(), second.tolist(), uniforms.tolist()
+        done = loop(kernel, vote, s, params, first, second, uniforms, counts, num_agents,
+                    trace_src, trace_values, trace_count)
+        if done > 0:
+            rounds += done
+            break
+        rounds += len(first)
+        if rounds >= max_rounds:
+            break
+        first, second, uniforms = stream.take(min(BLOCK_ROUNDS, max_rounds - rounds))
+
+    if backend == "python":
+        for values, updated in zip(row, s):
+            values[:] = updated
+    return rounds
@@ -0,0 +1,323 @@
+"""
+小种群的精确解：把模拟过程写成种群状态上的吸收马尔可夫链。
+
+  - agent 是可交换的，种群状态只记录各 agent 状态的多重集合（排序后的元组），
+    对称状态合并为一个；每轮抽到某两类 agent 的概率由各类的个数给出；
+  - 收敛（所有 agent 都投 Blue 或都投 Red）的状态为吸收态。
+
+两种求解方式：
+  - expected_rounds(..., max_rounds=None)：从初始状态做广度优先枚举，若可达的非吸收
+    状态是有限集合，构造稀疏转移矩阵 Q，用稀疏线性求解 (I - Q) m = 1 一次得到期望吸收时间 E[τ]。
+    只有 reward 类模型、且概率在更新下只取有限个值时（例如 ALPHA = BETA = 1 时只取 0、0.5、1）链才是有限的，
+    枚举之前就检查，计数模型与一般学习率立即抛出 ValueError。有限也不一定可解：ALPHA = BETA = 1 时
+    reward 只有奇数 N 能求解，偶数 N 与 reward_withoutSignal 都有永不收敛的状态（E[τ] 为无穷，同样抛出）；
+  - expected_rounds(..., max_rounds=T)：逐轮向前传播状态分布，得到 E[min(τ, T)] 与
+    P(τ > T)。这正是 simulate_for_agent_sizes 所估计的量（未收敛的运行记为 max_rounds）。
+    计数模型的状态空间随轮数无限增长，但总次数每轮严格增加，按轮截断后是一个有向无环图，
+    逐轮传播就是对这个稀疏三角系统的前代求解。
+
+状态数随 N 与轮数增长极快，只适用于很小的种群与较短的截断轮数（例如计数模型 N = 2）；
+能求解的情形状态数都在一万以内（reward N = 7 约 7300 个，history N = 2 截断到 80 轮约 6500 个）。
+枚举过程中一超过 max_states 就抛出 ValueError：枚举每个状态约需 0.2 毫秒，默认的 10 万个状态
+约 20 秒即可判定，例如 history N = 4 在第 5 轮就超过上限。
+"""
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from .models import get_model
+
+
+def _bernoulli(p):
+    # 概率为 0 的分支不会出现，直接略去，避免产生不可达状态
+    return [(value, prob) for value, prob in ((True, p), (False, 1.0 - p)) if prob > 0]
+
+
+def _reinforce(p, chosen_blue, success, alpha, beta):
+    # 与脚本及 models._reinforce 相同的更新顺序，保证浮点结果一致
+    if success:
+        p = p + alpha * (1 - p) if chosen_blue else p - alpha * p
+    else:
+        p = p - beta * p if chosen_blue else p + beta * (1 - p)
+    return max(0.0, min(1.0, p))
+
+
+# 有限链中每个概率至多取这么多个不同的值，超过时视为无限状态空间
+MAX_VALUES = 100
+
+
+def _orbit(alpha, beta, limit):
+    """概率从 0.5 出发在各种更新（成功 / 失败 × 选 Blue / Red）下能取到的值；超过 limit 个时返回 None。"""
+    seen = {0.5}
+    stack = [0.5]
+    while stack:
+        p = stack.pop()
+        for chosen_blue in (True, False):
+            for success in (True, False):
+                q = _reinforce(p, chosen_blue, success, alpha, beta)
+                if q not in seen:
+                    if len(seen) >= limit:
+                        return None
+                    seen.add(q)
+                    stack.append(q)
+    return seen
+
+
+class _HistoryChain:
+    # agent 状态：(blue_signal, blue_choice, total, vote)
+    def __init__(self, model):
+        self.pc = _integer_pseudo_count(model)
+
+    def initial(self):
+        return (self.pc, self.pc, 2 * self.pc, 0)
+
+    def vote(self, agent):
+        return agent[3]
+
+    def pair(self, a, b):
+        for sig_a, p_sa in _bernoulli(a[0] / a[2]):
+            for sig_b, p_sb in _bernoulli(b[0] / b[2]):
+                sides_a = [(sig_a, 1.0)] if sig_a == sig_b else _bernoulli(a[1] / a[2])
+                sides_b = [(sig_b, 1.0)] if sig_a == sig_b else _bernoulli(b[1] / b[2])
+                for side_a, p_ca in sides_a:
+                    for side_b, p_cb in sides_b:
+                        yield ((a[0] + sig_a, a[1] + side_a, a[2] + 1, 1 if side_a else -1),
+                               (b[0] + sig_b, b[1] + side_b, b[2] + 1, 1 if side_b else -1),
+                               p_sa * p_sb * p_ca * p_cb)
+
+
+class _HistoryWithoutSignalChain:
+    # agent 状态：(blue, total, vote)
+    def __init__(self, model):
+        self.pc = _integer_pseudo_count(model)
+
+    def initial(self):
+        return (self.pc, 2 * self.pc, 0)
+
+    def vote(self, agent):
+        return agent[2]
+
+    def pair(self, a, b):
+        for dir_a, p_a in _bernoulli(a[0] / a[1]):
+            for dir_b, p_b in _bernoulli(b[0] / b[1]):
+                yield ((a[0] + dir_a, a[1] + 1, 1 if dir_a else -1),
+                       (b[0] + dir_b, b[1] + 1, 1 if dir_b else -1),
+                       p_a * p_b)
+
+
+class _RewardChain:
+    # agent 状态：(p_signal, p_choice, vote)
+    def __init__(self, model):
+        self.alpha, self.beta = model.alpha, model.beta
+
+    def initial(self):
+        return (0.5, 0.5, 0)
+
+    def vote(self, agent):
+        return agent[2]
+
+    def _final(self, own, opponent, p_choice):
+        if own == opponent:
+            return [(own, True, 1.0)]
+        # (最终选择, 是否坚持自己, 概率)
+        return [(own if insisted else opponent, insisted, prob) for insisted, prob in _bernoulli(p_choice)]
+
+    def _next(self, agent, signal, final, insisted, match, success):
+        p_signal = _reinforce(agent[0], signal, success, self.alpha, self.beta)
+        p_choice = agent[1]
+        if not match and insisted:
+            if success:
+                p_choice = p_choice + self.alpha * (1 - p_choice)
+            else:
+                p_choice = p_choice - self.beta * p_choice
+            p_choice = max(0.0, min(1.0, p_choice))
+        return (p_signal, p_choice, 1 if final else -1)
+
+    def pair(self, a, b):
+        for sig_a, p_sa in _bernoulli(a[0]):
+            for sig_b, p_sb in _bernoulli(b[0]):
+                match = sig_a == sig_b
+                for final_a, ins_a, p_fa in self._final(sig_a, sig_b, a[1]):
+                    for final_b, ins_b, p_fb in self._final(sig_b, sig_a, b[1]):
+                        success = final_a == final_b
+                        yield (self._next(a, sig_a, final_a, ins_a, match, success),
+                               self._next(b, sig_b, final_b, ins_b, match, success),
+                               p_sa * p_sb * p_fa * p_fb)
+
+
+class _RewardWithoutSignalChain:
+    # agent 状态：(x,)
+    def __init__(self, model):
+        self.alpha, self.beta = model.alpha, model.beta
+
+    def initial(self):
+        return (0.5,)
+
+    def vote(self, agent):
+        return 1 if agent[0] >= 0.99 else (-1 if agent[0] <= 0.01 else 0)
+
+    def pair(self, a, b):
+        for dir_a, p_a in _bernoulli(a[0]):
+            for dir_b, p_b in _bernoulli(b[0]):
+                success = dir_a == dir_b
+                yield ((_reinforce(a[0], dir_a, success, self.alpha, self.beta),),
+                       (_reinforce(b[0], dir_b, success, self.alpha, self.beta),),
+                       p_a * p_b)
+
+
+CHAINS = {
+    "history": _HistoryChain,
+    "history_withoutSignal": _HistoryWithoutSignalChain,
+    "reward": _RewardChain,
+    "reward_withoutSignal": _RewardWithoutSignalChain,
+}
+
+
+def _integer_pseudo_count(model):
+    pc = model.pseudo_count
+    if float(pc) != int(pc):
+        raise ValueError(f"exact mode needs an integer pseudo_count, got {pc!r}")
+    return int(pc)
+
+
+def _chain(model, params):
+    model = get_model(model, **params) if isinstance(model, str) else model
+    return CHAINS[model.name](model)
+
+
+def _check_finite(chain):
+    """在枚举之前排除状态空间无限的参数组合。"""
+    if isinstance(chain, (_HistoryChain, _HistoryWithoutSignalChain)):
+        raise ValueError("the counts grow every round, so the chain has infinitely many states; "
+                         "pass max_rounds to solve the truncated chain instead")
+    if _orbit(chain.alpha, chain.beta, MAX_VALUES) is None:
+        raise ValueError(f"with alpha={chain.alpha!r}, beta={chain.beta!r} the probabilities take more than "
+                         f"{MAX_VALUES} distinct values, so the chain is not finite; pass max_rounds to solve "
+                         "the truncated chain instead (practical only for a few rounds)")
+
+
+def _absorbed(chain, state, num_agents):
+    votes = Counter(chain.vote(agent) for agent in state)
+    return votes[1] == num_agents or votes[-1] == num_agents
+
+
+def _successors(chain, state, num_agents):
+    """枚举一轮后的种群状态及其概率（对称状态已合并）。"""
+    counts = Counter(state)
+    kinds = list(counts)
+    norm = num_agents * (num_agents - 1)
+    out = defaultdict(float)
+    for a in kinds:
+        for b in kinds:
+            # 抽到有序的 (a 类, b 类) agent 对的概率
+            weight = counts[a] * (counts[b] - (a == b)) / norm
+            if weight == 0:
+                continue
+            rest = counts.copy()
+            rest[a] -= 1
+            rest[b] -= 1
+            for new_a, new_b, prob in chain.pair(a, b):
+                nxt = rest.copy()
+                nxt[new_a] += 1
+                nxt[new_b] += 1
+                out[tuple(sorted(nxt.elements()))] += weight * prob
+    return out
+
+
+def _solve_closed(chain, num_agents, max_states):
+    from scipy.sparse import coo_matrix, identity
+    from scipy.sparse.linalg import spsolve
+
+    _check_finite(chain)
+    start = tuple([chain.initial()] * num_agents)
+    index = {start: 0}
+    queue = [start]
+    rows, cols, vals = [], [], []
+    exits = set()
+    while queue:
+        state = queue.pop()
+        i = index[state]
+        for nxt, prob in _successors(chain, state, num_agents).items():
+            if _absorbed(chain, nxt, num_agents):
+                exits.add(i)
+                continue
+            if nxt not in index:
+                if len(index) >= max_states:
+                    raise ValueError(
+                        f"more than {max_states} reachable states: the chain is not finite for these "
+                        "parameters, pass max_rounds to solve the truncated chain instead")
+                index[nxt] = len(index)
+                queue.append(nxt)
+            rows.append(i)
+            cols.append(index[nxt])
+            vals.append(prob)
+    n = len(index)
+    # 从每个非吸收状态都必须能到达吸收态，否则 E[τ] 为无穷，I - Q 奇异
+    predecessors = defaultdict(list)
+    for i, j in zip(rows, cols):
+        predecessors[j].append(i)
+    reaches = set(exits)
+    stack = list(exits)
+    while stack:
+        for i in predecessors[stack.pop()]:
+            if i not in reaches:
+                reaches.add(i)
+                stack.append(i)
+    if len(reaches) < n:
+        raise ValueError(f"{n - len(reaches)} of {n} reachable states never converge, so E[rounds] is "
+                         "infinite; pass max_rounds to get E[min(rounds, max_rounds)] instead")
+    q = coo_matrix((vals, (rows, cols)), shape=(n, n)).tocsc()
+    times = spsolve(identity(n, format="csc") - q, np.ones(n))
+    return float(np.atleast_1d(times)[0]), n
+
+
+def expected_rounds(model, num_agents, max_rounds=None, max_states=100_000, **params):
+    """
+    精确计算期望收敛轮次。
+    max_rounds 为 None 时返回 {"mean": E[τ], "states": 非吸收状态数}，要求链是有限的；
+    否则返回 {"mean": E[min(τ, max_rounds)], "censored": P(τ > max_rounds),
+             "survival": 长度为 max_rounds + 1 的数组 P(τ > t), "states": 最大的单轮状态数}。
+    params 覆盖模型默认参数（alpha、beta、pseudo_count）。
+    """
+    chain = _chain(model, params)
+    if max_rounds is None:
+        mean, states = _solve_closed(chain, num_agents, max_states)
+        return {"mean": mean, "states": states}
+
+    dist = {tuple([chain.initial()] * num_agents): 1.0}
+    survival = np.zeros(max_rounds + 1)
+    peak = 1
+    for t in range(max_rounds + 1):
+        survival[t] = sum(dist.values())
+        if t == max_rounds or not dist:
+            break
+        nxt_dist = defaultdict(float)
+        for state, mass in dist.items():
+            for nxt, prob in _successors(chain, state, num_agents).items():
+                if not _absorbed(chain, nxt, num_agents):
+                    nxt_dist[nxt] += mass * prob
+            # 在构造这一轮的分布的过程中就检查，不必先把整轮（可能是上限的许多倍）算完
+            if len(nxt_dist) > max_states:
+                raise ValueError(f"more than {max_states} states at round {t + 1}; "
+                                 "exact mode is only practical for very small populations")
+        dist = nxt_dist
+        peak = max(peak, len(dist))
+    # E[min(τ, T)] = Σ_{t < T} P(τ > t)
+    return {"mean": float(survival[:max_rounds].sum()), "censored": float(survival[max_rounds]),
+            "survival": survival, "states": peak}
+
+
+def validate(model, num_agents, max_rounds, runs=2000, seed=None, **params):
+    """
+    用批量引擎的蒙特卡罗估计检验精确解：
+    返回精确值、模拟均值、标准误差以及两者之差的 z 值。
+    """
+    from .batch import run_batch
+
+    exact = expected_rounds(model, num_agents, max_rounds=max_rounds, **params)["mean"]
+    sim_model = get_model(model, **params) if isinstance(model, str) else model
+    rounds, _ = run_batch(sim_model, num_agents, runs, max_rounds=max_rounds, seed=seed)
+    mean = float(rounds.mean())
+    stderr = float(rounds.std(ddof=1) / np.sqrt(runs))
+    z = (mean - exact) / stderr if stderr > 0 else 0.0
+    return {"exact": exact, "monte_carlo": mean, "stderr": stderr, "z": z}
@@ -0,0 +1,142 @@
+"""
+结构化种群：用 CSR 邻接表表示的稀疏交互图。
+
+原来的模拟假设充分混合（任意两个 agent 都可能相遇）。给 run_replica / run_batch 传入 graph 后，
+每轮的交互对改为从图上抽取，学习规则与收敛判定不变：
+  - sampling="edge"（默认）：均匀抽取一条有向边 (i, j)，度数大的 agent 交互更频繁；
+  - sampling="node"：先均匀抽取 agent i，再从它的邻居中均匀抽取 j。
+两种方式每次抽样都是 O(1)（edge 方式额外保存每条边的起点，内存仍为 O(边数)）。
+在完全图上两种方式都等价于充分混合的均匀配对。
+
+图必须没有孤立点（否则该 agent 永远不会交互，也就不可能全局收敛），构造时检查，有孤立点则抛出 ValueError。
+内置生成器只用 NumPy，10^6 个节点的图在几秒内生成，不需要图论库：
+ring_lattice、grid_lattice、small_world（Watts–Strogatz）、scale_free（Barabási–Albert）、complete。
+"""
+import numpy as np
+
+SAMPLING = ("edge", "node")
+
+
+class CSRGraph:
+    """无向图的 CSR 表示：agent i 的邻居为 indices[indptr[i]:indptr[i + 1]]。"""
+
+    def __init__(self, indptr, indices, sampling="edge"):
+        if sampling not in SAMPLING:
+            raise ValueError(f"Unknown sampling {sampling!r}, expected one of {SAMPLING}")
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.num_agents = len(self.indptr) - 1
+        self.degrees = np.diff(self.indptr)
+        self.sampling = sampling
+        if self.num_agents < 2:
+            raise ValueError("a graph needs at least 2 agents")
+        if (self.degrees == 0).any():
+            raise ValueError(f"{int((self.degrees == 0).sum())} isolated agent(s): they can never interact, "
+                             "so the population can never converge")
+        # edge 方式按边抽样时需要每条边的起点
+        self.sources = np.repeat(np.arange(self.num_agents, dtype=np.int32), self.degrees) \
+            if sampling == "edge" else None
+
+    @classmethod
+    def from_edges(cls, num_agents, edges, sampling="edge"):
+        """由无向边列表（形状 (k, 2)）构造，去掉自环与重复边。"""
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        both = np.concatenate((edges, edges[:, ::-1]))
+        # 按 (起点, 终点) 排序并去重
+        keys = np.unique(both[:, 0] * num_agents + both[:, 1])
+        src, dst = np.divmod(keys, num_agents)
+        indptr = np.zeros(num_agents + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=num_agents), out=indptr[1:])
+        return cls(indptr, dst, sampling)
+
+    @property
+    def num_edges(self):
+        """无向边数。"""
+        return len(self.indices) // 2
+
+    def neighbors(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def sample(self, rng, size):
+        """抽取 size 个交互对，返回 (first, second)。"""
+        if self.sampling == "edge":
+            e = rng.integers(len(self.indices), size=size)
+            return self.sources[e].astype(np.int64), self.indices[e].astype(np.int64)
+        first = rng.integers(self.num_agents, size=size)
+        offset = (rng.random(size) * self.degrees[first]).astype(np.int64)
+        return first, self.indices[self.indptr[first] + offset].astype(np.int64)
+
+
+def complete(num_agents, sampling="edge"):
+    """完全图（O(N^2) 内存，只用于小 N 与充分混合模式对照）。"""
+    i, j = np.triu_indices(num_agents, 1)
+    return CSRGraph.from_edges(num_agents, np.stack((i, j), axis=1), sampling)
+
+
+def ring_lattice(num_agents, k=4, sampling="edge"):
+    """环形格：每个 agent 与两侧各 k // 2 个最近的 agent 相连。"""
+    if k < 2 or k % 2 or k >= num_agents:
+        raise ValueError("k must be even, at least 2 and less than num_agents")
+    nodes = np.arange(num_agents)
+    edges = [np.stack((nodes, (nodes + d) % num_agents), axis=1) for d in range(1, k // 2 + 1)]
+    return CSRGraph.from_edges(num_agents, np.concatenate(edges), sampling)
+
+
+def grid_lattice(rows, cols, periodic=True, sampling="edge"):
+    """二维格（4 邻居），periodic=True 时上下左右首尾相接（环面）。"""
+    index = np.arange(rows * cols).reshape(rows, cols)
+    if periodic:
+        edges = [np.stack((index.ravel(), np.roll(index, -1, axis=1).ravel()), axis=1),
+                 np.stack((index.ravel(), np.roll(index, -1, axis=0).ravel()), axis=1)]
+    else:
+        edges = [np.stack((index[:, :-1].ravel(), index[:, 1:].ravel()), axis=1),
+                 np.stack((index[:-1, :].ravel(), index[1:, :].ravel()), axis=1)]
+    return CSRGraph.from_edges(rows * cols, np.concatenate(edges), sampling)
+
+
+def small_world(num_agents, k=4, p=0.1, seed=None, sampling="edge"):
+    """
+    Watts–Strogatz 小世界网络：环形格的每条边以概率 p 把终点改接到随机 agent。
+    改接后产生的自环与重复边被去掉，边数可能略少于 N * k / 2。
+    """
+    rng = np.random.default_rng(seed)
+    lattice = ring_lattice(num_agents, k)
+    src = lattice.sources
+    dst = lattice.indices.astype(np.int64)
+    keep = src < dst
+    src, dst = src[keep].astype(np.int64), dst[keep]
+    rewire = rng.random(len(dst)) < p
+    dst[rewire] = rng.integers(num_agents, size=int(rewire.sum()))
+    return CSRGraph.from_edges(num_agents, np.stack((src, dst), axis=1), sampling)
+
+
+def scale_free(num_agents, m=2, seed=None, sampling="edge"):
+    """
+    Barabási–Albert 无标度网络：从 m + 1 个 agent 的完全图出发，之后每个新 agent 按度数成比例地连接
+    m 个已有 agent。用 Batagelj–Brandes 的端点数组算法，并把其中的串行依赖改写成向量化的指针跳跃：
+    第 k 条新边的目标是端点数组中随机位置 r_k < 2k 上的 agent（只在更早的端点中抽取），若 r_k 指向
+    另一条新边的目标，就沿指针继续跳，期望只需几轮。每个新 agent 的第一条边总是连到更早的 agent，
+    所以没有孤立点；同一 agent 的后几条边可能重复或成为自环，这些被去掉。
+    """
+    if m < 1 or num_agents <= m:
+        raise ValueError("m must be at least 1 and less than num_agents")
+    rng = np.random.default_rng(seed)
+    # 初始核心：m + 1 个 agent 的完全图，共 c 条边
+    core_src, core_dst = np.triu_indices(m + 1, 1)
+    c = len(core_src)
+    # 端点数组 M：M[2e]、M[2e + 1] 是第 e 条边的两个端点；新边 e = c + t 的起点为 m + 1 + t // m，
+    # 终点 M[2e + 1] = M[r_e]，r_e 均匀分布于 [0, 2e)
+    t = np.arange((num_agents - m - 1) * m)
+    edge = c + t
+    src = np.concatenate((core_src, m + 1 + t // m))
+    pointer = (rng.random(len(t)) * (2 * edge)).astype(np.int64)
+    target = pointer.copy()
+    jump = (target % 2 == 1) & (target // 2 >= c)
+    while jump.any():
+        target[jump] = pointer[target[jump] // 2 - c]
+        jump = (target % 2 == 1) & (target // 2 >= c)
+    # 剩下的奇数位置都是核心边的终点
+    dst = np.where(target % 2 == 0, src[target // 2], core_dst[np.minimum(target // 2, c - 1)])
+    edges = np.concatenate((np.stack((core_src, core_dst), axis=1), np.stack((src[c:], dst), axis=1)))
+    return CSRGraph.from_edges(num_agents, edges, sampling)
@@ -0,0 +1,106 @@
+"""
+模拟循环的可选观测：分阶段计时、事件计数与按轮采样的种群快照。
+
+    probe = Probe(sample_every=1000)
+
+    @probe.subscribe
+    def show(snapshot):
+        print(snapshot["round"], snapshot["blue"], snapshot["red"])
+
+    rounds, state = run_replica("reward", 200, seed=0, probe=probe)
+    print(probe.report())
+
+不传 probe 时 engine 走原来的热循环（安装了 Numba 时是编译后的版本），
+kernel 返回的事件掩码被直接丢弃，没有任何计时或回调，开销为零。
+传入 probe 时改用带观测的纯 Python 循环 engine._run_rounds_probed：
+  - 计时分为 pairing（生成配对与随机数）、interaction（kernel：决策与状态更新，
+    两者在 kernel 中交织，无法再细分）、convergence（投票与收敛计数）、observers（回调）；
+  - 计数器由 kernel 返回的事件掩码（models.EVENT_*）累加；
+  - 每 sample_every 轮（或在 sample_at 指定的轮次，例如对数间隔）以及收敛的那一轮，
+    向所有订阅者发送一次快照。
+"""
+import time
+
+import numpy as np
+
+from .models import EVENT_CHOICE_UPDATE_I, EVENT_CHOICE_UPDATE_J, EVENT_SIGNAL_MATCH, EVENT_SUCCESS
+
+PHASES = ("pairing", "interaction", "convergence", "observers")
+
+
+def log_rounds(max_rounds, points=100):
+    """1 到 max_rounds 之间对数均匀分布的（去重后的）整数轮次，用作 Probe 的 sample_at。"""
+    return np.unique(np.geomspace(1, max_rounds, points).round().astype(np.int64))
+
+
+class Probe:
+    """
+    计时器、计数器与观察者列表。
+    sample_every 为快照间隔（轮），为 0 时不定期发快照；sample_at 为升序的轮次列表，给出时代替
+    sample_every（见 log_rounds）。timers=False 时不计时，只计数。
+    同一个 Probe 可以用于多次运行，计时与计数会累加。
+    """
+
+    def __init__(self, sample_every=1000, timers=True, sample_at=None):
+        self.sample_every = sample_every
+        self.sample_at = None if sample_at is None else np.unique(np.asarray(sample_at, dtype=np.int64))
+        self.timers_enabled = timers
+        self.timers = dict.fromkeys(PHASES, 0.0)
+        self.counters = {"rounds": 0, "successes": 0, "signal_matches": 0, "choice_updates": 0}
+        self.observers = []
+
+    def subscribe(self, callback):
+        """
+        注册观察者 callback(snapshot)。snapshot 为字典：
+        round（当前轮次）、blue / red（投 Blue / Red 的 agent 数）、
+        state（{字段名: 数组} 的副本）、converged（是否已收敛）、counters（此刻计数器的副本）。
+        返回 callback，因此也可以当作装饰器使用。
+        """
+        self.observers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self.observers.remove(callback)
+
+    def next_sample(self, t):
+        """第 t 轮之后下一个发快照的轮次，没有时返回 -1。"""
+        if self.sample_at is not None:
+            k = np.searchsorted(self.sample_at, t, side="right")
+            return int(self.sample_at[k]) if k < len(self.sample_at) else -1
+        if self.sample_every:
+            return (t // self.sample_every + 1) * self.sample_every
+        return -1
+
+    def clock(self):
+        return time.perf_counter() if self.timers_enabled else 0.0
+
+    def count(self, events):
+        counters = self.counters
+        counters["rounds"] += 1
+        if events & EVENT_SUCCESS:
+            counters["successes"] += 1
+        if events & EVENT_SIGNAL_MATCH:
+            counters["signal_matches"] += 1
+        if events & EVENT_CHOICE_UPDATE_I:
+            counters["choice_updates"] += 1
+        if events & EVENT_CHOICE_UPDATE_J:
+            counters["choice_updates"] += 1
+
+    def emit(self, snapshot):
+        for callback in self.observers:
+            callback(snapshot)
+
+    def report(self):
+        """计时与计数的文本汇总。"""
+        total = sum(self.timers.values())
+        lines = []
+        if self.timers_enabled:
+            for phase in PHASES:
+                seconds = self.timers[phase]
+                share = seconds / total if total else 0.0
+                lines.append(f"{phase:12s} {seconds:10.4f} s  {share:6.1%}")
+        rounds = self.counters["rounds"]
+        for name, value in self.counters.items():
+            rate = f"  ({value / rounds:.3f} per round)" if rounds and name != "rounds" else ""
+            lines.append(f"{name:15s} {value}{rate}")
+        return "\n".join(lines)
@@ -0,0 +1,14 @@
+"""
+可选的 Numba 支持：安装了 Numba 时 njit 编译函数，否则原样返回，纯 Python 也能运行。
+"""
+try:
+    import numba
+except ImportError:
+    numba = None
+
+HAVE_NUMBA = numba is not None
+
+
+def njit(func):
+    """安装了 Numba 时编译 func（带磁盘缓存），否则原样返回。"""
+    return numba.njit(cache=True)(func) if HAVE_NUMBA else func
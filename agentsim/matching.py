@@ -0,0 +1,71 @@
+"""
+同步随机匹配模式：每一轮把整个种群随机分成 N // 2 对（随机完美匹配，N 为奇数时轮空一个），
+所有对同时交互，用模型的向量化 step 一次更新。
+
+原来的顺序模式每轮只有一对交互，每个 agent 平均交互一次需要 N / 2 轮；这里每轮就是一次
+“全员交互”，每轮开销为 O(N) 的几次数组运算，适合 10^4–10^6 个 agent。
+为了和顺序模式比较，同时报告轮数与交互总数（轮数 × N // 2，后者对应顺序模式的轮数）。
+注意这是不同的交互时序（同一轮内的各对互不影响），收敛时间的分布与顺序模式不完全相同。
+
+随机数来自 (模型, N, seed, 重复实验编号) 确定的独立流（与顺序模式的流不同），给定 seed 时可复现。
+"""
+import numpy as np
+
+from .models import get_model
+from .rng import model_key, root_seed
+from .sweep import replica_cells, summarize
+
+# 与顺序模式的 spawn_key 区分
+MATCHING_STREAM = 1
+
+
+def run_matching(model, num_agents, max_rounds=10000, seed=None, replica=0):
+    """
+    以同步随机匹配方式运行单个重复实验，直到全局收敛或达到 max_rounds 轮。
+    返回 (rounds, interactions, state)：interactions 为两两交互的总次数，
+    state 为 {字段名: 形状 (num_agents,) 的数组}。
+    """
+    if isinstance(model, str):
+        model = get_model(model)
+    if num_agents < 2:
+        raise ValueError("num_agents must be at least 2")
+    seq = np.random.SeedSequence(root_seed(seed),
+                                 spawn_key=(model_key(model.name), num_agents, replica, MATCHING_STREAM))
+    rng = np.random.Generator(np.random.PCG64(seq))
+    state = model.init_state(1, num_agents)
+    votes = model.votes(state)
+    blue = int((votes == 1).sum())
+    red = int((votes == -1).sum())
+    pairs = num_agents // 2
+
+    rounds = 0
+    while rounds < max_rounds:
+        rounds += 1
+        order = rng.permutation(num_agents)
+        pair = order[:2 * pairs].reshape(2, pairs)
+        u = rng.random((model.n_uniforms, pairs))
+        before = model.votes(state, pair)
+        model.step(state, pair, u)
+        after = model.votes(state, pair)
+        blue += int(np.count_nonzero(after == 1)) - int(np.count_nonzero(before == 1))
+        red += int(np.count_nonzero(after == -1)) - int(np.count_nonzero(before == -1))
+        if blue == num_agents or red == num_agents:
+            break
+    return rounds, rounds * pairs, {name: values[0] for name, values in state.items()}
+
+
+def _run(model, num_agents, max_rounds, seed, replica):
+    rounds, _, state = run_matching(model, num_agents, max_rounds, seed, replica)
+    return rounds, state
+
+
+def simulate_for_agent_sizes(model, agent_sizes, runs_per_size=20, max_rounds=10000, seed=None):
+    """
+    同步随机匹配版本的 simulate_for_agent_sizes。
+    返回字典 {agent_size: (avg_rounds, avg_interactions)}，并打印两者及最终统计量。
+    """
+    cells = replica_cells(_run, model, agent_sizes, runs_per_size, max_rounds, seed)
+    averages = summarize(cells.items(), max_rounds,
+                         extra=lambda size, rounds: f"Avg Interactions: {rounds.mean() * (size // 2):.0f}, ")
+    # 每轮恰好 N // 2 次交互
+    return {size: (avg, avg * (size // 2)) for size, avg in averages.items()}
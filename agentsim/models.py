@@ -0,0 +1,410 @@
+"""
+四种学习规则，与原来各脚本中的 Agent 类一一对应：
+
+  - history                : agent_simulation_history.py（信号 + 选择，基于计数）
+  - history_withoutSignal  : agent_simulation_history_withoutSignal.py（只有方向，基于计数）
+  - reward                 : agent_simulation_reward.py（信号 + 选择，基于奖励）
+  - reward_withoutSignal   : agent_simulation_reward_withoutSignal.py（只有方向，基于奖励）
+
+每条规则实现 Model 接口，所有引擎都只通过这个接口使用规则：
+
+  - fields / init_state()：种群状态是若干个形状为 (runs, num_agents) 的数组
+    （struct-of-arrays），热路径中没有逐 agent 的 Python 对象，也不保存无限增长的历史；
+    计数和概率是 float64，最近一次选择 "last" 是 int8（+1 Blue，-1 Red，0 尚未交互）；
+  - kernel(s, i, j, u, params)：单个重复实验中 agent i 与 j 交互一轮的标量规则。
+    s 是按 fields 顺序排列的各字段一维序列（NumPy 数组或 Python 列表均可），
+    u 为本轮的 n_uniforms 个均匀随机数。必须是模块级的普通函数（它调用的辅助函数
+    用 jit.njit 包装），engine 在安装了 Numba 时把它编译进共享的热循环。
+    返回本轮事件的位掩码（EVENT_*），只有开启 instrument.Probe 时才会被统计，
+    普通热循环直接丢弃返回值；
+  - params(row)：传给 kernel 的参数元组；批量引擎把剩下的重复实验交给标量热循环时
+    按行取参数（row 为 None 时参数必须是标量）；
+  - vote(s, i)：收敛判定用的投票，+1 表示 Blue，-1 表示 Red，0 表示尚未决定；
+  - step(state, pair, u)：可选的向量化版本，供批量引擎一次更新所有活跃重复实验。
+    pair 为形状 (2, m) 的展平下标（两行分别是每对中的两个 agent），u 的形状为
+    (n_uniforms, m)。基类给出一个逐行调用 kernel 的通用实现。
+    内置规则的参数（alpha、beta、pseudo_count）在批量引擎中也可以是长度为 runs 的数组，
+    每个重复实验使用自己的参数（见 grid）；
+  - votes(state, idx)：向量化的投票（idx 为 None 时返回整个 (runs, num_agents) 数组）。
+    基类对每个下标调用 vote，vote 为 last_vote 时直接读取 "last" 字段；
+  - stats(state)：每个 agent 的最终统计量 {标签: 数组}，用于打印 p(Blue) 等汇总；
+  - trace_field：开启轨迹记录时每轮写入环形缓冲区的字段。
+
+新规则只需实现 fields、init_state、kernel、vote 与 stats，即可使用所有引擎。
+"""
+import numpy as np
+
+from .jit import njit
+
+
+# kernel 返回的事件位掩码，由 instrument.Probe 汇总为计数器
+EVENT_SUCCESS = 1          # 双方最终选择一致（协调成功）
+EVENT_SIGNAL_MATCH = 2     # 双方信号一致
+EVENT_CHOICE_UPDATE_I = 4  # reward：agent i 坚持自己并更新了 p_choice
+EVENT_CHOICE_UPDATE_J = 8  # reward：agent j 坚持自己并更新了 p_choice
+
+
+def _flat(state):
+    # 状态数组是 C 连续的，reshape(-1) 返回视图，可以直接按展平下标读写
+    return {key: value.reshape(-1) for key, value in state.items()}
+
+
+def _per_row(value, shape, scale=1.0):
+    # 参数可以是标量，也可以是每个重复实验（行）一个取值的数组（参数网格扫描，见 grid）
+    out = np.empty(shape)
+    out[:] = scale * np.reshape(np.asarray(value, dtype=float), (-1, 1))
+    return out
+
+
+def _per_pair(value, pair, num_agents):
+    # 按每对 agent 所在的行取出参数；标量参数原样返回，不增加任何运算
+    if np.ndim(value) == 0:
+        return value
+    return np.asarray(value)[pair[0] // num_agents]
+
+
+def _at_row(value, row):
+    # 标量参数原样返回，每行一个取值的参数取第 row 行
+    return float(value if np.ndim(value) == 0 else np.asarray(value)[row])
+
+
+def _reinforce(p, chosen_blue, success, alpha, beta):
+    # 成功时向所选方向靠拢（步长 ALPHA），失败时远离所选方向（步长 BETA）
+    toward_blue = chosen_blue == success
+    rate = np.where(success, alpha, beta)
+    p = np.where(toward_blue, p + rate * (1 - p), p - rate * p)
+    return np.clip(p, 0.0, 1.0)
+
+
+@njit
+def _reinforce_scalar(p, chosen_blue, success, alpha, beta):
+    # 与 _reinforce 相同的更新顺序，保证标量与向量化版本的浮点结果逐位一致
+    if success:
+        if chosen_blue:
+            p = p + alpha * (1 - p)
+        else:
+            p = p - alpha * p
+    else:
+        if chosen_blue:
+            p = p - beta * p
+        else:
+            p = p + beta * (1 - p)
+    return max(0.0, min(1.0, p))
+
+
+def last_vote(s, i):
+    # "last" 字段总是排在 fields 的第一位
+    return s[0][i]
+
+
+def history_kernel(s, i, j, u, params):
+    last, blue_signal, blue_choice, total = s
+    total_i = total[i]
+    total_j = total[j]
+    # 第一次决策时初始伪计数给出的比例正好是 0.5
+    sig_i = u[0] < blue_signal[i] / total_i
+    sig_j = u[1] < blue_signal[j] / total_j
+    # 如果双方信号一致，则直接采用该信号，否则按各自选择历史中的 Blue 比例决定
+    if sig_i == sig_j:
+        side_i = sig_i
+        side_j = sig_j
+    else:
+        side_i = u[2] < blue_choice[i] / total_i
+        side_j = u[3] < blue_choice[j] / total_j
+    if sig_i:
+        blue_signal[i] += 1
+    if sig_j:
+        blue_signal[j] += 1
+    if side_i:
+        blue_choice[i] += 1
+    if side_j:
+        blue_choice[j] += 1
+    total[i] = total_i + 1
+    total[j] = total_j + 1
+    last[i] = 1 if side_i else -1
+    last[j] = 1 if side_j else -1
+    return (EVENT_SUCCESS if side_i == side_j else 0) | (EVENT_SIGNAL_MATCH if sig_i == sig_j else 0)
+
+
+def history_without_signal_kernel(s, i, j, u, params):
+    last, blue, total = s
+    dir_i = u[0] < blue[i] / total[i]
+    dir_j = u[1] < blue[j] / total[j]
+    if dir_i:
+        blue[i] += 1
+    if dir_j:
+        blue[j] += 1
+    total[i] += 1
+    total[j] += 1
+    last[i] = 1 if dir_i else -1
+    last[j] = 1 if dir_j else -1
+    return EVENT_SUCCESS if dir_i == dir_j else 0
+
+
+def reward_kernel(s, i, j, u, params):
+    last, p_signal, p_choice = s
+    alpha, beta = params
+    sig_i = u[0] < p_signal[i]
+    sig_j = u[1] < p_signal[j]
+    match = sig_i == sig_j
+    # 信号冲突时以 p_choice 的概率坚持自己的信号，否则跟随对方
+    insist_i = u[2] < p_choice[i]
+    insist_j = u[3] < p_choice[j]
+    final_i = sig_i if (match or insist_i) else sig_j
+    final_j = sig_j if (match or insist_j) else sig_i
+    success = final_i == final_j
+    p_signal[i] = _reinforce_scalar(p_signal[i], sig_i, success, alpha, beta)
+    p_signal[j] = _reinforce_scalar(p_signal[j], sig_j, success, alpha, beta)
+    events = EVENT_SUCCESS if success else 0
+    # p_choice 只在信号冲突且坚持自己时更新
+    if match:
+        events |= EVENT_SIGNAL_MATCH
+    else:
+        if insist_i:
+            events |= EVENT_CHOICE_UPDATE_I
+            c = p_choice[i]
+            c = c + alpha * (1 - c) if success else c - beta * c
+            p_choice[i] = max(0.0, min(1.0, c))
+        if insist_j:
+            events |= EVENT_CHOICE_UPDATE_J
+            c = p_choice[j]
+            c = c + alpha * (1 - c) if success else c - beta * c
+            p_choice[j] = max(0.0, min(1.0, c))
+    last[i] = 1 if final_i else -1
+    last[j] = 1 if final_j else -1
+    return events
+
+
+def reward_without_signal_kernel(s, i, j, u, params):
+    x = s[0]
+    alpha, beta = params
+    dir_i = u[0] < x[i]
+    dir_j = u[1] < x[j]
+    success = dir_i == dir_j
+    x[i] = _reinforce_scalar(x[i], dir_i, success, alpha, beta)
+    x[j] = _reinforce_scalar(x[j], dir_j, success, alpha, beta)
+    return EVENT_SUCCESS if success else 0
+
+
+def extreme_vote(s, i):
+    # 收敛条件：所有 x 均 ≥ 0.99 或均 ≤ 0.01
+    x = s[0][i]
+    if x >= 0.99:
+        return 1
+    if x <= 0.01:
+        return -1
+    return 0
+
+
+def format_stats(stats):
+    """把 {标签: 每个 agent 的取值} 格式化为 "Avg 标签: 均值" 的汇总字符串。"""
+    return ", ".join(f"Avg {label}: {np.mean(values):.2f}" for label, values in stats.items())
+
+
+class Model:
+    """学习规则接口，见模块说明。"""
+    name = None
+    fields = ()
+    n_uniforms = 2
+    trace_field = "last"
+    kernel = None
+    vote = staticmethod(last_vote)
+
+    def params(self, row=None):
+        """传给 kernel 的参数元组；参数是每行一个取值的数组时（见 grid）取第 row 行的取值。"""
+        return ()
+
+    def init_state(self, runs, num_agents):
+        raise NotImplementedError
+
+    def row(self, state, r):
+        """第 r 个重复实验的状态，按 fields 顺序排列的一维视图元组，可直接传给 kernel。"""
+        return tuple(state[name][r] for name in self.fields)
+
+    def step(self, state, pair, u):
+        # 通用实现：逐个重复实验调用标量 kernel；四个内置规则都有向量化版本
+        num_agents = state[self.fields[0]].shape[1]
+        rows, agents = np.divmod(pair, num_agents)
+        params = self.params()
+        for k in range(pair.shape[1]):
+            self.kernel(self.row(state, rows[0, k]), agents[0, k], agents[1, k], u[:, k], params)
+
+    def votes(self, state, idx=None):
+        if self.vote is last_vote:
+            last = state["last"]
+            return last if idx is None else last.reshape(-1)[idx]
+        # 通用实现：对每个下标调用标量 vote（各字段展平后下标相同）
+        flat = tuple(state[name].reshape(-1) for name in self.fields)
+        if idx is None:
+            idx = np.arange(flat[0].size).reshape(state[self.fields[0]].shape)
+        idx = np.asarray(idx)
+        return np.array([self.vote(flat, i) for i in idx.reshape(-1).tolist()], dtype=np.int8).reshape(idx.shape)
+
+    def stats(self, state):
+        raise NotImplementedError
+
+
+class HistoryModel(Model):
+    """信号 + 选择的计数模型（agent_simulation_history.py）。"""
+    name = "history"
+    fields = ("last", "blue_signal", "blue_choice", "total")
+    n_uniforms = 4
+    kernel = staticmethod(history_kernel)
+
+    def __init__(self, pseudo_count=2):
+        self.pseudo_count = pseudo_count
+
+    def init_state(self, runs, num_agents):
+        shape = (runs, num_agents)
+        return {
+            "last": np.zeros(shape, dtype=np.int8),
+            "blue_signal": _per_row(self.pseudo_count, shape),
+            "blue_choice": _per_row(self.pseudo_count, shape),
+            # 信号与选择每次交互都各加 1，两者的总次数始终相同，共用一个数组
+            "total": _per_row(self.pseudo_count, shape, 2.0),
+        }
+
+    def step(self, state, pair, u):
+        s = _flat(state)
+        total = s["total"][pair]
+        signal = u[:2] < s["blue_signal"][pair] / total
+        # signal[::-1] 交换两行，即每个 agent 看到的对方信号
+        match = signal == signal[::-1]
+        # 信号一致时直接采用该信号，否则按各自选择历史中的 Blue 比例决定
+        side = np.where(match, signal, u[2:] < s["blue_choice"][pair] / total)
+        s["blue_signal"][pair] += signal
+        s["blue_choice"][pair] += side
+        s["total"][pair] = total + 1
+        s["last"][pair] = np.where(side, 1, -1)
+
+    def stats(self, state):
+        return {
+            "Signal p(Blue)": state["blue_signal"] / state["total"],
+            "Choice p(Blue)": state["blue_choice"] / state["total"],
+        }
+
+
+class HistoryWithoutSignalModel(Model):
+    """只有方向的计数模型（agent_simulation_history_withoutSignal.py）。"""
+    name = "history_withoutSignal"
+    fields = ("last", "blue", "total")
+    n_uniforms = 2
+    kernel = staticmethod(history_without_signal_kernel)
+
+    def __init__(self, pseudo_count=1.0):
+        self.pseudo_count = pseudo_count
+
+    def init_state(self, runs, num_agents):
+        shape = (runs, num_agents)
+        return {
+            "last": np.zeros(shape, dtype=np.int8),
+            "blue": _per_row(self.pseudo_count, shape),
+            "total": _per_row(self.pseudo_count, shape, 2.0),
+        }
+
+    def step(self, state, pair, u):
+        s = _flat(state)
+        total = s["total"][pair]
+        direction = u < s["blue"][pair] / total
+        s["blue"][pair] += direction
+        s["total"][pair] = total + 1
+        s["last"][pair] = np.where(direction, 1, -1)
+
+    def stats(self, state):
+        return {"p(Blue)": state["blue"] / state["total"]}
+
+
+class RewardModel(Model):
+    """信号 + 选择的奖励学习模型（agent_simulation_reward.py）。"""
+    name = "reward"
+    fields = ("last", "p_signal", "p_choice")
+    n_uniforms = 4
+    kernel = staticmethod(reward_kernel)
+
+    def __init__(self, alpha=0.8, beta=0.8):
+        self.alpha = alpha
+        self.beta = beta
+
+    def params(self, row=None):
+        return (_at_row(self.alpha, row), _at_row(self.beta, row))
+
+    def init_state(self, runs, num_agents):
+        shape = (runs, num_agents)
+        return {
+            "last": np.zeros(shape, dtype=np.int8),
+            "p_signal": np.full(shape, 0.5),
+            "p_choice": np.full(shape, 0.5),
+        }
+
+    def step(self, state, pair, u):
+        num_agents = state["p_choice"].shape[1]
+        alpha = _per_pair(self.alpha, pair, num_agents)
+        beta = _per_pair(self.beta, pair, num_agents)
+        s = _flat(state)
+        choice = s["p_choice"][pair]
+        signal = u[:2] < s["p_signal"][pair]
+        opponent = signal[::-1]
+        match = signal == opponent
+        # 信号冲突时以 p_choice 的概率坚持自己的信号，否则跟随对方
+        insisted = u[2:] < choice
+        final = np.where(match | insisted, signal, opponent)
+        success = final[0] == final[1]
+        s["p_signal"][pair] = _reinforce(s["p_signal"][pair], signal, success, alpha, beta)
+        # p_choice 只在信号冲突且坚持自己时更新
+        updated = np.where(success, choice + alpha * (1 - choice), choice - beta * choice)
+        s["p_choice"][pair] = np.where(~match & insisted, np.clip(updated, 0.0, 1.0), choice)
+        s["last"][pair] = np.where(final, 1, -1)
+
+    def stats(self, state):
+        return {"p_signal": state["p_signal"], "p_choice": state["p_choice"]}
+
+
+class RewardWithoutSignalModel(Model):
+    """只有方向的奖励学习模型（agent_simulation_reward_withoutSignal.py）。"""
+    name = "reward_withoutSignal"
+    fields = ("x",)
+    n_uniforms = 2
+    trace_field = "x"
+    kernel = staticmethod(reward_without_signal_kernel)
+    vote = staticmethod(extreme_vote)
+
+    def __init__(self, alpha=0.5, beta=0.4):
+        self.alpha = alpha
+        self.beta = beta
+
+    def params(self, row=None):
+        return (_at_row(self.alpha, row), _at_row(self.beta, row))
+
+    def init_state(self, runs, num_agents):
+        return {"x": np.full((runs, num_agents), 0.5)}
+
+    def step(self, state, pair, u):
+        num_agents = state["x"].shape[1]
+        alpha = _per_pair(self.alpha, pair, num_agents)
+        beta = _per_pair(self.beta, pair, num_agents)
+        s = _flat(state)
+        direction = u < s["x"][pair]
+        success = direction[0] == direction[1]
+        s["x"][pair] = _reinforce(s["x"][pair], direction, success, alpha, beta)
+
+    def votes(self, state, idx=None):
+        x = state["x"] if idx is None else state["x"].reshape(-1)[idx]
+        return (x >= 0.99).astype(np.int8) - (x <= 0.01).astype(np.int8)
+
+    def stats(self, state):
+        return {"x": state["x"]}
+
+
+MODELS = {
+    model.name: model
+    for model in (HistoryModel, HistoryWithoutSignalModel, RewardModel, RewardWithoutSignalModel)
+}
+
+
+def get_model(name, **params):
+    """按名字创建模型实例，params 覆盖脚本中的默认参数（ALPHA、BETA、PSEUDO_COUNT）。"""
+    try:
+        cls = MODELS[name]
+    except KeyError:
+        raise ValueError(f"Unknown model {name!r}, expected one of {sorted(MODELS)}") from None
+    return cls(**params)
@@ -0,0 +1,55 @@
+"""
+收敛轮次随 agent 数量变化的折线图，四个脚本与命令行入口共用。
+matplotlib 只在真正画图时导入，纯模拟不需要它。
+给出 path 时用非交互的 Agg 后端写成图片文件，不会在没有显示器的服务器上阻塞或报错；
+否则调用 plt.show() 弹出窗口。
+"""
+
+
+def _pyplot(path):
+    import matplotlib
+
+    if path:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def _finish(plt, path):
+    if path:
+        plt.savefig(path, bbox_inches="tight")
+        plt.close()
+    else:
+        plt.show()
+
+
+def plot_results(results, title, ylabel="Average Rounds to Convergence", path=None):
+    plt = _pyplot(path)
+    sizes = sorted(results.keys())
+    rounds_list = [results[size] for size in sizes]
+    plt.figure(figsize=(8, 6))
+    plt.plot(sizes, rounds_list, marker='o')
+    plt.xlabel("Number of Agents")
+    plt.ylabel(ylabel)
+    plt.title(title)
+    plt.grid(True)
+    _finish(plt, path)
+
+
+def plot_models(series, title="Convergence Rounds vs. Agent Population Size",
+                ylabel="Average Rounds to Convergence", path=None, log=True):
+    """多个模型画在同一张图上：series 为 {图例: {agent_size: rounds}}，log=True 时纵轴取对数。"""
+    plt = _pyplot(path)
+    plt.figure(figsize=(8, 6))
+    for label, results in series.items():
+        sizes = sorted(results.keys())
+        plt.plot(sizes, [results[size] for size in sizes], marker='o', label=label)
+    if log:
+        plt.yscale("log")
+    plt.xlabel("Number of Agents")
+    plt.ylabel(ylabel)
+    plt.title(title)
+    plt.grid(True)
+    plt.legend()
+    _finish(plt, path)
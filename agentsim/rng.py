@@ -0,0 +1,99 @@
+"""
+可复现的分块随机数流。
+
+每个重复实验有一个独立的随机数流，由 (模型, agent 数量, seed, 重复实验编号)
+唯一确定：SeedSequence(seed, spawn_key=(模型编号, num_agents, replica))。
+因此任意一个重复实验都可以单独重放，与它在哪个进程、和多少个重复实验一起批量运行无关。
+
+随机数总是按固定大小（BLOCK_ROUNDS 轮）整块生成，每轮固定消耗：
+  - 两个配对下标 i ≠ j（均匀分布于有序的不同 agent 对；给定交互图时为图上的一条边）；
+  - n_uniforms 个 [0, 1) 均匀随机数。
+每轮消耗量固定，且整块生成的顺序与调用方每次取多少轮无关，
+所以逐 agent 实现（脚本）与批量引擎在同一个流上得到逐位相同的结果。
+"""
+import zlib
+
+import numpy as np
+
+BLOCK_ROUNDS = 1024
+
+
+def model_key(model_name):
+    """模型名对应的稳定整数编号（用于 spawn_key）。"""
+    return zlib.crc32(model_name.encode("utf-8"))
+
+
+def root_seed(seed):
+    """seed 为 None 时取一个新的随机熵，使同一次调用中的所有重复实验共享同一个根种子。"""
+    return np.random.SeedSequence().entropy if seed is None else seed
+
+
+class ReplicaStream:
+    """单个重复实验的随机数流。"""
+
+    def __init__(self, model_name, num_agents, n_uniforms, seed, replica=0, graph=None):
+        if num_agents < 2:
+            raise ValueError("num_agents must be at least 2")
+        if graph is not None and graph.num_agents != num_agents:
+            raise ValueError(f"graph has {graph.num_agents} agents, not {num_agents}")
+        # graph 不为 None 时配对从交互图上抽取（见 graph.CSRGraph.sample）
+        self.graph = graph
+        seq = np.random.SeedSequence(root_seed(seed), spawn_key=(model_key(model_name), num_agents, replica))
+        self.rng = np.random.Generator(np.random.PCG64(seq))
+        self.num_agents = num_agents
+        self.n_uniforms = n_uniforms
+        self._pos = BLOCK_ROUNDS
+        self._first = self._second = self._uniforms = None
+
+    def _refill(self):
+        # 记下生成本块之前的生成器状态，检查点只需保存它和块内位置即可重建缓冲区
+        self._block_state = self.rng.bit_generator.state
+        if self.graph is not None:
+            first, second = self.graph.sample(self.rng, BLOCK_ROUNDS)
+        else:
+            first = self.rng.integers(self.num_agents, size=BLOCK_ROUNDS)
+            second = self.rng.integers(self.num_agents - 1, size=BLOCK_ROUNDS)
+            second += second >= first
+        self._first, self._second = first, second
+        self._uniforms = self.rng.random((BLOCK_ROUNDS, self.n_uniforms))
+        self._pos = 0
+
+    def take(self, rounds):
+        """
+        取接下来 rounds 轮的随机数，返回 (first, second, uniforms)，
+        形状分别为 (rounds,)、(rounds,)、(rounds, n_uniforms)。
+        """
+        parts = []
+        while rounds > 0:
+            if self._pos == BLOCK_ROUNDS:
+                self._refill()
+            k = min(rounds, BLOCK_ROUNDS - self._pos)
+            sl = slice(self._pos, self._pos + k)
+            parts.append((self._first[sl], self._second[sl], self._uniforms[sl]))
+            self._pos += k
+            rounds -= k
+        if len(parts) == 1:
+            return parts[0]
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+    def get_state(self):
+        """
+        流的当前位置：{"bit_generator": 生成当前块之前的 PCG64 状态, "pos": 块内位置}。
+        只含 Python 整数与字符串，可以写进 JSON；set_state 重新生成当前块后恢复位置。
+        """
+        if self._pos == BLOCK_ROUNDS:
+            return {"bit_generator": self.rng.bit_generator.state, "pos": BLOCK_ROUNDS}
+        return {"bit_generator": self._block_state, "pos": self._pos}
+
+    def set_state(self, state):
+        self.rng.bit_generator.state = state["bit_generator"]
+        self._pos = BLOCK_ROUNDS
+        if state["pos"] < BLOCK_ROUNDS:
+            self._refill()
+            self._pos = state["pos"]
+
+    def __iter__(self):
+        """逐轮产生 (i, j, uniforms) 的 Python 标量元组，供逐 agent 实现使用。"""
+        while True:
+            first, second, uniforms = self.take(BLOCK_ROUNDS)
+            yield from zip(first.tolist(), second.tolist(), uniforms.tolist())
@@ -0,0 +1,219 @@
+"""
+按 agent 数量扫描：对每个 (agent 数量, 重复实验) 调用 engine.run_replica，
+可在进程池中并行。
+
+  - workers 不为 1 时，按预计开销从大到小提交任务（agent 数量越大越慢），
+    避免最后只剩一个大任务在跑而其他进程空闲；
+  - 每个任务使用由 (模型, agent 数量, seed, 重复实验编号) 确定的随机数流
+    （见 rng.ReplicaStream），因此结果与进程数无关；
+  - simulate_for_agent_sizes 把结果汇总为 {agent_size: avg_rounds} 字典，并打印最终 p(Blue) 等统计；
+    其他模式（批量、同步匹配、tau-leaping）的同名函数也都通过 summarize 汇总，
+    逐个运行重复实验的模式用 replica_cells 组装结果；
+    run_sweep 返回各重复实验的收敛轮次与最终统计量（命令行入口 agentsim.cli 用它保存结果）；
+  - 传入 cache（cache.ResultCache）且给定 seed 时，只计算缓存中还没有的重复实验；
+  - 传入 checkpoint_dir 时，已完成的重复实验定期写入 checkpoint_dir/sweep.npz，
+    进行中的重复实验各自写入 replica-<N>-<编号>.npz；中断后用同样的参数再次调用即从断点继续。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import checkpoint
+from .engine import run_replica
+from .models import format_stats, get_model
+from .rng import root_seed
+
+
+def _run_replica(task):
+    model, size, replica, max_rounds, seed, checkpoint_dir, interval = task
+    path = os.path.join(checkpoint_dir, f"replica-{size}-{replica}.npz") if checkpoint_dir else None
+    rounds, state = run_replica(model, size, max_rounds=max_rounds, seed=seed, replica=replica,
+                                checkpoint_path=path, checkpoint_interval=interval)
+    return size, replica, rounds, model.stats(state)
+
+
+def _save_completed(path, config, completed):
+    labels = list(completed[0][3]) if completed else []
+    arrays = {
+        "size": np.array([c[0] for c in completed], dtype=np.int64),
+        "replica": np.array([c[1] for c in completed], dtype=np.int64),
+        "rounds": np.array([c[2] for c in completed], dtype=np.int64),
+    }
+    # 各 agent 数量的统计量长度不同，按完成顺序首尾相接存放
+    for k, label in enumerate(labels):
+        arrays[f"stat{k}"] = np.concatenate([c[3][label] for c in completed])
+    checkpoint.save(path, {"config": config, "labels": labels}, arrays)
+
+
+def _load_completed(meta, arrays):
+    completed = []
+    offset = 0
+    for size, replica, rounds in zip(arrays["size"].tolist(), arrays["replica"].tolist(), arrays["rounds"].tolist()):
+        stats = {label: arrays[f"stat{k}"][offset:offset + size] for k, label in enumerate(meta["labels"])}
+        completed.append((size, replica, rounds, stats))
+        offset += size
+    return completed
+
+
+def _expected_cost(size):
+    # 收敛轮数大致随 agent 数量平方增长，只用于排序
+    return size * size
+
+
+def _collect(round_counts, final_stats, runs_per_size, size, replica, rounds, stats):
+    round_counts[size][replica] = rounds
+    for label, values in stats.items():
+        column = final_stats[size].setdefault(label, [None] * runs_per_size)
+        column[replica] = values
+
+
+def run_sweep(model, agent_sizes, runs_per_size=20, max_rounds=100000, workers=1, seed=None,
+              cache=None, checkpoint_dir=None, checkpoint_interval=checkpoint.DEFAULT_INTERVAL):
+    """
+    对于给定 agent 数量列表，每个数量重复 runs_per_size 次模拟。
+    model 为模型名或模型实例；workers 不为 1 时在进程池中并行运行（None 表示使用全部 CPU 核）。
+    seed 为 None 时每次调用使用新的随机熵；给定 seed 时结果可复现，且与 workers 无关。
+    cache 为可选的 ResultCache：已缓存的重复实验直接复用，新算出的追加写回。
+    checkpoint_dir 不为 None 时每隔 checkpoint_interval 秒写检查点，已有检查点时从断点继续
+    （seed 为 None 时沿用检查点中的根种子），全部完成后删除检查点。
+    返回 (seed, {agent_size: (各重复实验的收敛轮次, 最终统计量)})，seed 为实际使用的根种子。
+    """
+    if isinstance(model, str):
+        model = get_model(model)
+    use_cache = cache is not None and seed is not None
+    sweep_path = os.path.join(checkpoint_dir, "sweep.npz") if checkpoint_dir else None
+    resumed = checkpoint.load(sweep_path) if sweep_path else None
+    config = dict(checkpoint.model_config(model), max_rounds=max_rounds, seed=seed)
+    if resumed is not None:
+        checkpoint.check_config(resumed[0], config, sweep_path)
+        seed = resumed[0]["config"]["seed"]
+    config["seed"] = seed = root_seed(seed)
+
+    round_counts = {size: [0] * runs_per_size for size in agent_sizes}
+    final_stats = {size: {} for size in agent_sizes}
+    cached_runs = {size: 0 for size in agent_sizes}
+    for size in agent_sizes:
+        cached = cache.load(model, size, max_rounds, seed, runs_per_size) if use_cache else None
+        if cached is not None:
+            rounds, stats = cached
+            cached_runs[size] = len(rounds)
+            round_counts[size][:len(rounds)] = rounds.tolist()
+            padding = [None] * (runs_per_size - len(rounds))
+            final_stats[size] = {label: list(values) + padding for label, values in stats.items()}
+
+    # 检查点中已完成、且本次需要的重复实验
+    completed = _load_completed(*resumed) if resumed is not None else []
+    finished = set()
+    for size, replica, rounds, stats in completed:
+        if size in round_counts and cached_runs[size] <= replica < runs_per_size:
+            finished.add((size, replica))
+            _collect(round_counts, final_stats, runs_per_size, size, replica, rounds, stats)
+    tasks = [
+        (model, size, replica, max_rounds, seed, checkpoint_dir, checkpoint_interval)
+        for size in agent_sizes
+        for replica in range(cached_runs[size], runs_per_size)
+        if (size, replica) not in finished
+    ]
+
+    timer = checkpoint.Timer(checkpoint_interval) if sweep_path else None
+    pool = None if workers == 1 else ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+    try:
+        if pool is None:
+            outputs = map(_run_replica, tasks)
+        else:
+            tasks.sort(key=lambda task: _expected_cost(task[1]), reverse=True)
+            # chunksize=1：任务按提交顺序（开销从大到小）逐个分配给空闲进程
+            outputs = pool.map(_run_replica, tasks, chunksize=1)
+        for size, replica, rounds, stats in outputs:
+            _collect(round_counts, final_stats, runs_per_size, size, replica, rounds, stats)
+            if timer is not None:
+                completed.append((size, replica, rounds, stats))
+                if timer.due():
+                    _save_completed(sweep_path, config, completed)
+    except BaseException:
+        # 中断（Ctrl-C）或出错时立即保存已完成的部分
+        if timer is not None:
+            _save_completed(sweep_path, config, completed)
+        raise
+    finally:
+        if pool is not None:
+            # 出错或中断时取消还没有开始的任务
+            pool.shutdown(cancel_futures=True)
+    if sweep_path and os.path.exists(sweep_path):
+        os.remove(sweep_path)
+
+    results = {}
+    for size in agent_sizes:
+        stats = {label: np.stack(values) for label, values in final_stats[size].items()}
+        if use_cache and cached_runs[size] < runs_per_size:
+            cache.store(model, size, max_rounds, seed, round_counts[size], stats)
+        results[size] = (np.array(round_counts[size], dtype=np.int64), stats)
+    return seed, results
+
+
+def summary_line(size, rounds, max_rounds, stats, extra=""):
+    """
+    一个 agent 数量的汇总行："Agent Size: …, Avg Rounds to Convergence: …, [Censored: …, ]Avg …"。
+    extra 插在平均轮次之后（例如 "Avg Interactions: …, "）。
+    """
+    # 达到 max_rounds 的运行并未收敛（右删失），平均值只是下界
+    censored = int((np.asarray(rounds) >= max_rounds).sum())
+    note = f"Censored: {censored}, " if censored else ""
+    return (f"Agent Size: {size}, Avg Rounds to Convergence: {float(np.mean(rounds)):.1f}, {extra}{note}"
+            f"{format_stats(stats)}")
+
+
+def summarize(cells, max_rounds, extra=None):
+    """
+    各种模式的 simulate_for_agent_sizes 共用的汇总：cells 为 (agent_size, (各重复实验的收敛轮次, 最终统计量))
+    的可迭代对象（例如 dict.items()，或逐个计算的生成器），逐行打印 summary_line
+    （extra(size, rounds) 给出附加字段），返回 {agent_size: 平均收敛轮次}。
+    """
+    results = {}
+    for size, (rounds, stats) in cells:
+        results[size] = float(np.mean(rounds))
+        print(summary_line(size, rounds, max_rounds, stats, extra(size, rounds) if extra else ""))
+    return results
+
+
+def _run_cell_task(task):
+    runner, model, size, replica, max_rounds, seed, options = task
+    rounds, state = runner(model, size, max_rounds=max_rounds, seed=seed, replica=replica, **options)
+    return rounds, model.stats(state)
+
+
+def replica_cells(runner, model, agent_sizes, runs_per_size=20, max_rounds=100000, seed=None, workers=1,
+                  **options):
+    """
+    用单个重复实验的 runner(model, size, max_rounds=…, seed=…, replica=…, **options) -> (rounds, state)
+    运行每个 (agent 数量, 重复实验)，返回 {agent_size: (各重复实验的收敛轮次, 最终统计量)}。
+    workers 不为 1 时在进程池中并行（runner 须为模块级函数）；各 agent 数量共用同一个根种子，结果与 workers 无关。
+    """
+    if isinstance(model, str):
+        model = get_model(model)
+    seed = root_seed(seed)
+    tasks = [(runner, model, size, replica, max_rounds, seed, options)
+             for size in agent_sizes for replica in range(runs_per_size)]
+    if workers == 1:
+        outputs = list(map(_run_cell_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            outputs = list(pool.map(_run_cell_task, tasks))
+    cells = {}
+    for k, size in enumerate(agent_sizes):
+        cell = outputs[k * runs_per_size:(k + 1) * runs_per_size]
+        cells[size] = (np.array([rounds for rounds, _ in cell], dtype=np.int64),
+                       {label: np.stack([stats[label] for _, stats in cell]) for label in cell[0][1]})
+    return cells
+
+
+def simulate_for_agent_sizes(model, agent_sizes, runs_per_size=20, max_rounds=100000, workers=1, seed=None,
+                             cache=None, checkpoint_dir=None, checkpoint_interval=checkpoint.DEFAULT_INTERVAL):
+    """
+    run_sweep 的汇总版本（参数相同）：打印每个 agent 数量的平均收敛轮次与最终统计量，
+    返回字典 {agent_size: avg_rounds_to_convergence}。
+    """
+    _, cells = run_sweep(model, agent_sizes, runs_per_size, max_rounds, workers, seed, cache, checkpoint_dir,
+                         checkpoint_interval)
+    return summarize(cells.items(), max_rounds)
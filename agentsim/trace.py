@@ -0,0 +1,61 @@
+"""
+可选的逐 agent 轨迹记录：固定深度的环形缓冲区。
+
+脚本中的 Agent 原来把每次决策追加到无限增长的列表里；这里每个 agent
+只保留最近 depth 条记录，内存为 O(runs * num_agents * depth)，与运行轮数无关。
+缓冲区的 dtype 必须能容纳模型 trace_field 的取值（reward_withoutSignal 记录的是浮点的 x），
+用 TraceRing.for_model 按模型构造；run_replica / run_batch 开始前检查，不匹配时抛出 ValueError。
+"""
+import numpy as np
+
+
+class TraceRing:
+    """
+    形状为 (runs, num_agents, depth) 的环形缓冲区，外加每个 agent 已写入的条数。
+    由 run_batch(..., trace=TraceRing(...)) 在每轮交互后写入模型的 trace_field。
+    """
+
+    def __init__(self, runs, num_agents, depth, dtype=np.int8):
+        if depth <= 0:
+            raise ValueError("depth must be positive")
+        self.depth = depth
+        self.values = np.zeros((runs, num_agents, depth), dtype=dtype)
+        self.count = np.zeros((runs, num_agents), dtype=np.int64)
+
+    @classmethod
+    def for_model(cls, model, runs, num_agents, depth):
+        """dtype 与 model.trace_field 相同的缓冲区，model 可以是模型名或模型实例。"""
+        return cls(runs, num_agents, depth, dtype=_field_dtype(model))
+
+    def check(self, model, runs, num_agents):
+        """形状与 (runs, num_agents) 不符，或 dtype 装不下 model.trace_field 时抛出 ValueError。"""
+        if self.count.shape != (runs, num_agents):
+            raise ValueError(f"trace has shape {self.count.shape}, expected ({runs}, {num_agents})")
+        dtype = _field_dtype(model)
+        if not np.can_cast(dtype, self.values.dtype, "same_kind"):
+            raise ValueError(f"trace dtype {self.values.dtype} cannot hold {model.trace_field!r} values of dtype "
+                             f"{dtype}; build the buffer with TraceRing.for_model")
+
+    def record(self, pair, values):
+        # pair 为展平后的 agent 下标，同一轮中不会重复
+        count = self.count.reshape(-1)
+        slots = pair * self.depth + count[pair] % self.depth
+        self.values.reshape(-1)[slots] = values
+        count[pair] += 1
+
+    def agent_trace(self, run, agent):
+        """按时间顺序返回某个 agent 最近（至多 depth 条）的记录。"""
+        n = int(self.count[run, agent])
+        buf = self.values[run, agent]
+        if n <= self.depth:
+            return buf[:n].copy()
+        start = n % self.depth
+        return np.concatenate((buf[start:], buf[:start]))
+
+
+def _field_dtype(model):
+    from .models import get_model
+
+    if isinstance(model, str):
+        model = get_model(model)
+    return model.init_state(1, 1)[model.trace_field].dtype
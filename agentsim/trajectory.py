@@ -0,0 +1,113 @@
+"""
+种群层面的轨迹记录：在指定轮次（固定间隔或对数间隔）记录
+  - blue / red：投 Blue / Red 的 agent 比例；
+  - success_rate：上一个记录点以来协调成功的交互比例；
+  - mean <标签>：模型最终统计量（p(Blue)、p_signal、p_choice、x……）在种群上的均值。
+记录通过 instrument.Probe 的快照回调完成，不改动热循环。
+
+存储是按列的、可内存映射的 .npy 文件，每个重复实验一个：
+    <path>/meta.json            列名、记录轮次、模型与参数
+    <path>/replica-<k>.npy      形状 (列数, 记录点数) 的 float64 数组，列主序
+文件在运行开始时按记录点数预先分配（np.lib.format.open_memmap），每攒满 chunk_rows 行写入一次，
+未用到的记录点保持 NaN；读取时用 mmap 打开并截掉尾部，成千上万条长轨迹不必全部载入内存。
+"""
+import json
+import os
+
+import numpy as np
+
+from .checkpoint import model_config
+from .engine import run_replica
+from .instrument import Probe, log_rounds
+from .models import get_model
+from .rng import root_seed
+
+BASE_COLUMNS = ("round", "blue", "red", "success_rate")
+
+
+def schedule(max_rounds, every=None, log_points=None):
+    """记录轮次：every 给出时为固定间隔，否则为 log_points（默认 100）个对数间隔的点。"""
+    if every:
+        return np.arange(every, max_rounds + 1, every, dtype=np.int64)
+    return log_rounds(max_rounds, log_points or 100)
+
+
+class TrajectoryWriter:
+    """单个重复实验的轨迹文件，作为 Probe 的观察者逐行写入。"""
+
+    def __init__(self, path, columns, capacity, chunk_rows=256):
+        self.columns = columns
+        self.data = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64,
+                                              shape=(len(columns), capacity))
+        self.data[:] = np.nan
+        self.buffer = np.empty((len(columns), chunk_rows))
+        self.rows = 0
+        self.pending = 0
+        self.last_round = 0
+        self.last_successes = 0
+
+    def row(self, t, blue, red, num_agents, successes, stats):
+        if t == self.last_round:
+            return
+        rate = (successes - self.last_successes) / (t - self.last_round)
+        values = [t, blue / num_agents, red / num_agents, rate]
+        values.extend(float(np.mean(v)) for v in stats.values())
+        self.buffer[:, self.pending] = values
+        self.pending += 1
+        self.last_round, self.last_successes = t, successes
+        if self.pending == self.buffer.shape[1]:
+            self.flush()
+
+    def flush(self):
+        self.data[:, self.rows:self.rows + self.pending] = self.buffer[:, :self.pending]
+        self.rows += self.pending
+        self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.data.flush()
+        del self.data
+
+
+def record_trajectories(model, num_agents, path, runs=1, max_rounds=100000, seed=None, every=None,
+                        log_points=None, first_replica=0):
+    """
+    运行 runs 个重复实验并把轨迹写到目录 path（见模块说明），记录轮次见 schedule，
+    另外总会记录最后一轮（收敛或达到 max_rounds）。
+    返回各重复实验的收敛轮次列表。
+    """
+    if isinstance(model, str):
+        model = get_model(model)
+    seed = root_seed(seed)
+    at = schedule(max_rounds, every, log_points)
+    init = model.init_state(1, num_agents)
+    columns = list(BASE_COLUMNS) + [f"mean {label}" for label in model.stats(init)]
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({**model_config(model), "num_agents": num_agents, "max_rounds": max_rounds, "seed": seed,
+                   "columns": columns, "rounds": at.tolist()}, f)
+
+    results = []
+    for replica in range(first_replica, first_replica + runs):
+        # 最后一轮不一定在记录轮次中，多留一个位置
+        writer = TrajectoryWriter(os.path.join(path, f"replica-{replica}.npy"), columns, len(at) + 1)
+        probe = Probe(timers=False, sample_at=at)
+        probe.subscribe(lambda snap: writer.row(snap["round"], snap["blue"], snap["red"], num_agents,
+                                                snap["counters"]["successes"], model.stats(snap["state"])))
+        rounds, state = run_replica(model, num_agents, max_rounds=max_rounds, seed=seed, replica=replica,
+                                    probe=probe)
+        votes = model.votes({name: values[None] for name, values in state.items()})
+        writer.row(rounds, int((votes == 1).sum()), int((votes == -1).sum()), num_agents,
+                   probe.counters["successes"], model.stats(state))
+        writer.close()
+        results.append(rounds)
+    return results
+
+
+def load_trajectory(path, replica, mmap=True):
+    """读取一个重复实验的轨迹：{列名: 一维数组}（mmap=True 时为内存映射的视图）。"""
+    with open(os.path.join(path, "meta.json")) as f:
+        columns = json.load(f)["columns"]
+    data = np.load(os.path.join(path, f"replica-{replica}.npy"), mmap_mode="r" if mmap else None)
+    length = int(np.count_nonzero(~np.isnan(data[0])))
+    return {name: data[k, :length] for k, name in enumerate(columns)}
@@ -0,0 +1,279 @@
+"""
+多机扫描：共享文件系统上的工作队列。
+
+一次扫描（模型 × 参数 × agent 数量 × 重复实验）被切分成互相独立的分片，每个分片是
+(模型, 参数, N, max_rounds, seed, 重复实验区间 [start, stop))，逐个重复实验用单重复实验引擎
+engine.run_replica 计算（有 Numba 时编译为机器码），结果与单机运行同一批重复实验逐位一致。队列目录：
+
+    <root>/todo/<分片>.json     待计算
+    <root>/leases/<分片>.json   已被某个 worker 领取（租约）
+    <root>/done/<分片>.npz      结果：各重复实验的收敛轮次与最终统计量
+    <root>/failed/<分片>.json   重试 max_attempts 次仍然失败
+
+  - 领取分片就是把它从 todo/ 重命名到 leases/：rename 是原子的，同一个分片只会被一个 worker 领到；
+  - worker 计算期间每隔 lease_timeout / 4 秒更新租约文件的修改时间（心跳）；
+    修改时间超过 lease_timeout 秒的租约视为 worker 已经崩溃，任何 worker 都会把它放回 todo/ 重试；
+  - 每个重复实验的随机数流由 (模型, N, seed, 重复实验编号) 确定，同一分片无论算几次结果都相同，
+    所以一个只是变慢、并没有崩溃的 worker 与接手的 worker 重复计算也无害，后写的结果原样覆盖；
+  - 结果先写临时文件再原子替换，merge 只会读到完整的结果文件。
+租约按文件修改时间判断，各机器的时钟偏差应远小于 lease_timeout。
+
+    python -m agentsim.workqueue submit /shared/sweep --model history --sizes 20 50 --runs 200 --seed 0
+    python -m agentsim.workqueue work /shared/sweep          # 在任意多台机器上各启动若干个
+    python -m agentsim.workqueue merge /shared/sweep --csv history.csv
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+from . import checkpoint
+from .adaptive import censored_summary
+from .cache import cache_key
+from .engine import run_replica
+from .grid import write_csv
+from .models import MODELS, get_model
+from .rng import root_seed
+from .sweep import summary_line
+
+STATES = ("todo", "leases", "done", "failed")
+
+
+def _path(root, state, shard_id):
+    return os.path.join(root, state, shard_id + (".npz" if state == "done" else ".json"))
+
+
+def _write_json(path, payload):
+    tmp = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _list(root, state):
+    names = os.listdir(os.path.join(root, state))
+    return sorted(name.rsplit(".", 1)[0] for name in names if not name.endswith(".tmp"))
+
+
+def submit(root, model, agent_sizes, runs_per_size=20, max_rounds=100000, seed=None, shard_runs=10, **params):
+    """
+    把 model（模型名，参数由 params 给出）在 agent_sizes 上各 runs_per_size 个重复实验的扫描
+    按每片 shard_runs 个重复实验放入队列 root。可以向同一个队列提交多个模型或参数设置；
+    已经在队列中（或已完成）的分片不会重复加入。返回根种子与新加入的分片数。
+    """
+    instance = get_model(model, **params)
+    seed = root_seed(seed)
+    for state in STATES:
+        os.makedirs(os.path.join(root, state), exist_ok=True)
+    existing = {shard_id for state in STATES for shard_id in _list(root, state)}
+    added = 0
+    for size in agent_sizes:
+        key = cache_key(instance, size, max_rounds, seed)
+        for start in range(0, runs_per_size, shard_runs):
+            stop = min(start + shard_runs, runs_per_size)
+            shard_id = f"{key[:16]}-{start:06d}-{stop:06d}"
+            if shard_id in existing:
+                continue
+            _write_json(_path(root, "todo", shard_id), {
+                **checkpoint.model_config(instance), "key": key, "num_agents": size, "max_rounds": max_rounds,
+                "seed": seed, "start": start, "stop": stop, "attempts": 0})
+            added += 1
+    return seed, added
+
+
+def requeue_expired(root, lease_timeout=600, max_attempts=3):
+    """把超时的租约放回 todo/（尝试次数用完的移到 failed/），返回处理的分片数。"""
+    now = time.time()
+    moved = 0
+    for shard_id in _list(root, "leases"):
+        lease = _path(root, "leases", shard_id)
+        try:
+            if now - os.path.getmtime(lease) <= lease_timeout:
+                continue
+            spec = _read_json(lease)
+            target = "failed" if spec["attempts"] >= max_attempts else "todo"
+            os.rename(lease, _path(root, target, shard_id))
+        except FileNotFoundError:
+            # 另一个 worker 刚刚完成或回收了这个分片
+            continue
+        moved += 1
+    return moved
+
+
+def _claim(root, worker):
+    for shard_id in _list(root, "todo"):
+        lease = _path(root, "leases", shard_id)
+        try:
+            os.rename(_path(root, "todo", shard_id), lease)
+            # rename 保留了在 todo/ 中等待时的修改时间，立即刷新，否则排队较久的分片一领到就像是已经超时
+            os.utime(lease)
+            if os.path.exists(_path(root, "done", shard_id)):
+                os.remove(lease)
+                continue
+            spec = _read_json(lease)
+        except FileNotFoundError:
+            # 另一个 worker 抢先领走，或在刷新之前把它当作超时的租约放回了 todo/：换下一个分片
+            continue
+        spec["attempts"] += 1
+        spec["worker"] = worker
+        _write_json(lease, spec)
+        return shard_id, spec
+    return None, None
+
+
+def _compute(spec):
+    model = MODELS[spec["model"]](**spec["params"])
+    # 分片里的重复实验大多是慢的长尾运行，单重复实验引擎比批量引擎快得多
+    outputs = [run_replica(model, spec["num_agents"], spec["max_rounds"], seed=spec["seed"], replica=k)
+               for k in range(spec["start"], spec["stop"])]
+    rounds = np.array([rounds for rounds, _ in outputs], dtype=np.int64)
+    stats = [model.stats(state) for _, state in outputs]
+    return rounds, {label: np.stack([s[label] for s in stats]) for label in stats[0]}
+
+
+def _heartbeat(lease, interval, stop):
+    while not stop.wait(interval):
+        try:
+            os.utime(lease)
+        except FileNotFoundError:
+            return
+
+
+def work(root, lease_timeout=600, max_attempts=3, poll=5.0, max_shards=None):
+    """
+    worker 循环：回收超时的租约，领取并计算分片，直到队列中既没有待计算的分片、也没有别的 worker
+    正在计算的分片（后者可能因为崩溃而需要重试，所以在它们完成之前每隔 poll 秒再看一次），
+    或者已经完成 max_shards 个分片。返回本 worker 完成的分片数。
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    completed = 0
+    while max_shards is None or completed < max_shards:
+        requeue_expired(root, lease_timeout, max_attempts)
+        shard_id, spec = _claim(root, worker)
+        if shard_id is None:
+            if not _list(root, "leases"):
+                break
+            time.sleep(poll)
+            continue
+        lease = _path(root, "leases", shard_id)
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(lease, lease_timeout / 4, stop), daemon=True)
+        beat.start()
+        try:
+            rounds, stats = _compute(spec)
+        except Exception as error:
+            stop.set()
+            spec["error"] = repr(error)
+            target = "failed" if spec["attempts"] >= max_attempts else "todo"
+            _write_json(lease, spec)
+            os.rename(lease, _path(root, target, shard_id))
+            print(f"{worker}: shard {shard_id} failed ({error!r}), moved to {target}/", file=sys.stderr)
+            continue
+        stop.set()
+        beat.join()
+        labels = list(stats)
+        checkpoint.save(_path(root, "done", shard_id), {"shard": spec, "labels": labels},
+                        {"rounds": np.asarray(rounds, dtype=np.int64),
+                         **{f"stat{k}": np.asarray(stats[label]) for k, label in enumerate(labels)}})
+        try:
+            os.remove(lease)
+        except FileNotFoundError:
+            pass
+        completed += 1
+    return completed
+
+
+def status(root):
+    """各状态的分片数：{"todo": …, "leases": …, "done": …, "failed": …}。"""
+    return {state: len(_list(root, state)) for state in STATES}
+
+
+def merge(root, partial=False):
+    """
+    合并已完成分片的结果：每个 (模型, 参数, N, max_rounds, seed) 单元格一行的整洁表，
+    列为模型名、各参数、n、runs、censored、mean（受限均值）、median（超过一半删失时为 None）与 std，
+    并打印与 simulate_for_agent_sizes 相同格式的汇总。
+    队列中还有未完成或失败的分片时抛出 ValueError（partial=True 时只合并已完成的部分）。
+    """
+    pending = {state: count for state, count in status(root).items() if state != "done" and count}
+    if pending and not partial:
+        raise ValueError(f"sweep in {root} is not complete: {pending} shard(s) outstanding")
+    cells = {}
+    for shard_id in _list(root, "done"):
+        meta, arrays = checkpoint.load(_path(root, "done", shard_id))
+        spec = meta["shard"]
+        cells.setdefault(spec["key"], []).append((spec, meta["labels"], arrays))
+
+    rows = []
+    for shards in sorted(cells.values(), key=lambda s: (s[0][0]["model"], sorted(s[0][0]["params"].items()),
+                                                        s[0][0]["num_agents"])):
+        shards.sort(key=lambda shard: shard[0]["start"])
+        spec, labels = shards[0][0], shards[0][1]
+        rounds = np.concatenate([arrays["rounds"] for _, _, arrays in shards])
+        stats = {label: np.concatenate([arrays[f"stat{k}"] for _, _, arrays in shards])
+                 for k, label in enumerate(labels)}
+        summary = censored_summary(rounds, spec["max_rounds"])
+        rows.append(dict(model=spec["model"], **spec["params"], n=spec["num_agents"], runs=len(rounds),
+                         censored=summary["censored"], mean=summary["mean"], median=summary["median"],
+                         std=float(rounds.std(ddof=1)) if len(rounds) > 1 else 0.0))
+        print(f"{spec['model']} {spec['params']} "
+              + summary_line(spec["num_agents"], rounds, spec["max_rounds"], stats, extra=f"Runs: {len(rounds)}, "))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m agentsim.workqueue", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("submit", help="把一次扫描切分成分片放入队列")
+    p.add_argument("root")
+    p.add_argument("--model", required=True, choices=sorted(MODELS))
+    p.add_argument("--sizes", nargs="+", type=int, required=True)
+    p.add_argument("--runs", type=int, default=20, help="每个 agent 数量的重复次数")
+    p.add_argument("--max-rounds", type=int, default=100000)
+    p.add_argument("--seed", type=int, help="根种子，不给出时取新的随机熵（打印出来）")
+    p.add_argument("--shard-runs", type=int, default=10, help="每个分片的重复实验数")
+    p.add_argument("--param", nargs=2, action="append", default=[], metavar=("NAME", "VALUE"),
+                   help="模型参数，例如 --param alpha 0.5（可重复）")
+    p = commands.add_parser("work", help="从队列领取并计算分片，直到队列清空")
+    p.add_argument("root")
+    p.add_argument("--lease-timeout", type=float, default=600, help="租约超时（秒），应远大于单个分片的耗时")
+    p.add_argument("--max-attempts", type=int, default=3)
+    p.add_argument("--poll", type=float, default=5.0)
+    p.add_argument("--max-shards", type=int)
+    p = commands.add_parser("status", help="各状态的分片数")
+    p.add_argument("root")
+    p = commands.add_parser("merge", help="合并结果为每个 agent 数量的统计量")
+    p.add_argument("root")
+    p.add_argument("--partial", action="store_true", help="只合并已完成的分片")
+    p.add_argument("--csv", help="把整洁表写成 CSV")
+    args = parser.parse_args(argv)
+
+    if args.command == "submit":
+        params = {name: float(value) for name, value in args.param}
+        seed, added = submit(args.root, args.model, args.sizes, args.runs, args.max_rounds, args.seed,
+                             args.shard_runs, **params)
+        print(f"seed {seed}: {added} shard(s) added to {args.root}")
+    elif args.command == "work":
+        done = work(args.root, args.lease_timeout, args.max_attempts, args.poll, args.max_shards)
+        print(f"{done} shard(s) completed")
+    elif args.command == "status":
+        print(" ".join(f"{state}={count}" for state, count in status(args.root).items()))
+    else:
+        rows = merge(args.root, args.partial)
+        if args.csv and rows:
+            write_csv(rows, args.csv)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""删失感知的汇总与自适应重复次数的停止原因。"""
+import math
+
+import numpy as np
+import pytest
+
+from agentsim.adaptive import adaptive_runs, censored_summary
+from agentsim.batch import run_batch
+
+
+def test_restricted_mean_counts_censored_runs_at_max_rounds():
+    summary = censored_summary([10, 20, 100, 100], 100)
+    assert summary["runs"] == 4
+    assert summary["censored"] == 2
+    assert summary["mean"] == 57.5
+
+
+def test_median_is_reported_while_at_most_half_is_censored():
+    summary = censored_summary([10, 20, 30, 100, 100], 100)
+    assert summary["censored"] == 2
+    assert summary["median"] == 30.0
+    # 中位数区间的上端落在删失部分
+    assert math.isinf(summary["median_ci"][1])
+
+
+def test_median_is_none_once_more_than_half_is_censored():
+    summary = censored_summary([10, 20, 100, 100, 100], 100)
+    assert summary["censored"] == 3
+    assert summary["median"] is None
+    assert summary["mean"] == 66.0
+
+
+def test_no_censoring():
+    rounds = [5, 1, 3, 2, 4]
+    summary = censored_summary(rounds, 100)
+    assert summary["censored"] == 0
+    assert summary["median"] == 3.0
+    assert summary["mean"] == 3.0
+    assert summary["median_ci"][0] <= 3.0 <= summary["median_ci"][1] < math.inf
+
+
+def test_all_censored_stops_after_first_batch():
+    summary = adaptive_runs("history", 20, max_rounds=50, seed=0, min_runs=20)
+    assert summary["stopped"] == "censored"
+    assert summary["runs"] == 20
+    assert summary["censored"] == 20
+    assert summary["median"] is None
+    assert summary["mean"] == 50.0
+
+
+def test_uncensored_cell_stops_on_precision():
+    summary = adaptive_runs("reward_withoutSignal", 4, max_rounds=10000, seed=0, rel_width=0.2)
+    assert summary["stopped"] == "precision"
+    assert summary["censored"] == 0
+    assert 20 < summary["runs"] < 2000
+    # 追加的重复实验编号连续，结果与一次运行同样多的重复实验相同
+    rounds, _ = run_batch("reward_withoutSignal", 4, summary["runs"], max_rounds=10000, seed=0)
+    assert summary["mean"] == float(rounds.mean())
+
+
+@pytest.mark.parametrize("limits, reason", [
+    ({"max_runs": 40}, "max_runs"),
+    ({"budget_rounds": 1}, "budget"),
+])
+def test_run_limits(limits, reason):
+    summary = adaptive_runs("reward_withoutSignal", 4, max_rounds=10000, seed=0, rel_width=0.001, **limits)
+    assert summary["stopped"] == reason
+    assert summary["runs"] == limits.get("max_runs", 20)
+    assert set(summary["stats"]) == {"x"}
+    assert np.shape(summary["stats"]["x"]) == (summary["runs"], 4)
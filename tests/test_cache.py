@@ -0,0 +1,39 @@
+"""ResultCache.extend 复用已缓存的重复实验，只计算缺少的部分。"""
+import numpy as np
+
+from agentsim.batch import run_batch
+from agentsim.cache import ResultCache
+from agentsim.models import get_model
+
+
+def test_extend_reuses_cached_replicas(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    model = get_model("reward")
+    requested = []
+
+    def compute(start, stop):
+        requested.append((start, stop))
+        rounds, state = run_batch(model, 6, stop - start, max_rounds=3000, seed=4, first_replica=start)
+        return rounds, model.stats(state)
+
+    first, _ = cache.extend(model, 6, 3000, 4, 3, compute)
+    rounds, stats = cache.extend(model, 6, 3000, 4, 5, compute)
+    again, _ = cache.extend(model, 6, 3000, 4, 4, compute)
+    assert requested == [(0, 3), (3, 5)]
+
+    expected, state = run_batch(model, 6, 5, max_rounds=3000, seed=4)
+    np.testing.assert_array_equal(rounds, expected)
+    np.testing.assert_array_equal(first, expected[:3])
+    np.testing.assert_array_equal(again, expected[:4])
+    for label, values in model.stats(state).items():
+        np.testing.assert_array_equal(stats[label], values)
+
+
+def test_key_separates_parameters(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    model = get_model("reward")
+    rounds, state = run_batch(model, 4, 2, max_rounds=1000, seed=0)
+    cache.store(model, 4, 1000, 0, rounds, model.stats(state))
+    assert cache.load(model, 4, 1000, 0) is not None
+    assert cache.load(get_model("reward", alpha=0.5), 4, 1000, 0) is None
+    assert cache.load(model, 4, 2000, 0) is None
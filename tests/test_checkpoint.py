@@ -0,0 +1,62 @@
+"""中断后从检查点继续，结果与不中断的运行逐位相同。"""
+import os
+
+import numpy as np
+import pytest
+
+from agentsim import sweep
+from agentsim.engine import run_replica
+from agentsim.instrument import Probe
+from agentsim.sweep import run_sweep
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_replica_resume_is_bit_identical(tmp_path):
+    path = str(tmp_path / "replica.npz")
+    expected_rounds, expected = run_replica("history", 20, max_rounds=6000, seed=1, backend="python")
+
+    # 每个块结束时都写快照，在第 3000 轮中断（快照停在第 2048 轮）
+    probe = Probe(sample_at=[3000], timers=False)
+
+    @probe.subscribe
+    def stop(snapshot):
+        raise Interrupted
+
+    with pytest.raises(Interrupted):
+        run_replica("history", 20, max_rounds=6000, seed=1, checkpoint_path=path, checkpoint_interval=0,
+                    probe=probe)
+    assert os.path.exists(path)
+    rounds, state = run_replica("history", 20, max_rounds=6000, checkpoint_path=path, backend="python")
+    assert rounds == expected_rounds
+    for field, values in expected.items():
+        np.testing.assert_array_equal(state[field], values)
+
+
+def test_sweep_resume_is_bit_identical(tmp_path, monkeypatch):
+    _, expected = run_sweep("reward", [4, 6], 3, max_rounds=2000, seed=2)
+
+    # 第 4 个重复实验开始时中断，已完成的 3 个写入 sweep.npz
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 4:
+            raise Interrupted
+        return run_replica(*args, **kwargs)
+
+    monkeypatch.setattr(sweep, "run_replica", flaky)
+    with pytest.raises(Interrupted):
+        run_sweep("reward", [4, 6], 3, max_rounds=2000, seed=2, checkpoint_dir=str(tmp_path))
+    assert os.path.exists(tmp_path / "sweep.npz")
+
+    calls.clear()
+    _, cells = run_sweep("reward", [4, 6], 3, max_rounds=2000, checkpoint_dir=str(tmp_path))
+    assert len(calls) == 3
+    assert not os.path.exists(tmp_path / "sweep.npz")
+    for size, (rounds, stats) in expected.items():
+        np.testing.assert_array_equal(cells[size][0], rounds)
+        for label, values in stats.items():
+            np.testing.assert_array_equal(cells[size][1][label], values)
@@ -0,0 +1,70 @@
+"""report --readme 只替换 README 顶部的表格与紧随其后的说明段落，其余内容原样保留。"""
+import pytest
+
+from agentsim import cli
+
+RESULTS = {"models": {
+    "history": {"params": {"pseudo_count": 2.0}, "seed": 0, "max_rounds": 1000, "runs_per_size": 3,
+                "cells": {"2": {"rounds": [1, 2, 3], "mean": 2.0, "median": 2.0, "censored": 0},
+                          "4": {"rounds": [1000, 1000, 5], "mean": 668.3, "median": None, "censored": 2}}},
+    "reward": {"params": {"alpha": 0.8, "beta": 0.8}, "seed": 0, "max_rounds": 1000, "runs_per_size": 3,
+               "cells": {"2": {"rounds": [1, 1, 4], "mean": 2.0, "median": 1.0, "censored": 0}}},
+}}
+
+OLD_TABLE = """| Agent Size | History (Avg Rounds) |
+|------------|----------------------|
+| 2          | 1.4                  |"""
+
+TAIL = """## Simulation core
+
+正文，包括另一张表：
+
+| a | b |
+|---|---|
+| 1 | 2 |
+"""
+
+
+def _update(tmp_path, text):
+    path = tmp_path / "Readme.md"
+    path.write_text(text, encoding="utf-8")
+    cli.update_readme(str(path), cli.readme_table(RESULTS), cli.table_note(RESULTS))
+    return path.read_text(encoding="utf-8")
+
+
+def _expected(tail):
+    return cli.readme_table(RESULTS) + "\n\n" + cli.table_note(RESULTS) + "\n\n" + tail
+
+
+def test_table_without_note(tmp_path):
+    assert _update(tmp_path, OLD_TABLE + "\n\n" + TAIL) == _expected(TAIL)
+
+
+def test_table_directly_followed_by_text(tmp_path):
+    assert _update(tmp_path, OLD_TABLE + "\n" + TAIL) == _expected(TAIL)
+
+
+def test_old_note_is_replaced_and_following_paragraph_kept(tmp_path):
+    extra = "表中的收敛轮次是首达时间。\n第二行。\n\n" + TAIL
+    text = "# Title\n\n" + OLD_TABLE + "\n\n上表由旧版本生成：\n跨两行。\n\n" + extra
+    assert _update(tmp_path, text) == "# Title\n\n" + _expected(extra)
+
+
+def test_update_is_idempotent(tmp_path):
+    once = _update(tmp_path, OLD_TABLE + "\n\n" + TAIL)
+    assert _update(tmp_path, once) == once
+
+
+def test_table_cells(tmp_path):
+    lines = cli.readme_table(RESULTS).split("\n")
+    # history N=4 超过一半删失，reward 没有 N=4，都记为 "-"；两列之外的模型也是 "-"
+    assert [cell.strip() for cell in lines[2].split("|")[1:-1]] == ["2", "2.0", "-", "2.0", "-"]
+    assert [cell.strip() for cell in lines[3].split("|")[1:-1]] == ["4", "-", "-", "-", "-"]
+
+
+def test_readme_without_table_raises(tmp_path):
+    path = tmp_path / "Readme.md"
+    path.write_text("# Title\n\n| a | b |\n|---|---|\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        cli.update_readme(str(path), cli.readme_table(RESULTS), cli.table_note(RESULTS))
+    assert path.read_text(encoding="utf-8") == "# Title\n\n| a | b |\n|---|---|\n"
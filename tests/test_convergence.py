@@ -0,0 +1,51 @@
+"""收敛轮次是首达时间：种群第一次全体投同一方的那一轮，而不是每隔 10 轮检查一次。"""
+import pytest
+
+from agentsim.batch import run_batch
+from agentsim.engine import run_replica
+from agentsim.models import MODELS, get_model
+from agentsim.rng import ReplicaStream
+
+
+def _first_passage(name, num_agents, seed, replica, max_rounds):
+    # 手动逐轮推进同一个随机数流，每轮对所有 agent 全量扫描投票
+    model = get_model(name)
+    state = model.init_state(1, num_agents)
+    s = tuple(state[field][0].tolist() for field in model.fields)
+    stream = ReplicaStream(model.name, num_agents, model.n_uniforms, seed, replica)
+    for t, (i, j, u) in enumerate(stream, start=1):
+        model.kernel(s, i, j, u, model.params())
+        votes = {model.vote(s, agent) for agent in range(num_agents)}
+        if votes == {1} or votes == {-1}:
+            return t
+        if t == max_rounds:
+            return max_rounds
+
+
+def test_two_agents_converge_on_first_agreeing_round():
+    # N = 2 的 history：第一轮两个 agent 的 last 相同时收敛轮次就是 1，否则是第一次相同的那一轮
+    model = get_model("history")
+    for replica in range(20):
+        stream = iter(ReplicaStream("history", 2, model.n_uniforms, 0, replica))
+        state = model.init_state(1, 2)
+        s = tuple(state[field][0].tolist() for field in model.fields)
+        t = 0
+        while True:
+            t += 1
+            i, j, u = next(stream)
+            model.kernel(s, i, j, u, model.params())
+            if s[0][0] == s[0][1]:
+                break
+        assert run_replica("history", 2, seed=0, replica=replica, backend="python")[0] == t
+
+
+@pytest.mark.parametrize("name", sorted(MODELS))
+def test_rounds_are_exact_first_passage(name):
+    runs = 12
+    expected = [_first_passage(name, 4, 7, replica, 5000) for replica in range(runs)]
+    rounds, _ = run_batch(name, 4, runs, max_rounds=5000, seed=7)
+    assert rounds.tolist() == expected
+    assert [run_replica(name, 4, max_rounds=5000, seed=7, replica=r, backend="python")[0]
+            for r in range(runs)] == expected
+    # 不是只在 10 的整数倍轮上检查
+    assert any(t % 10 for t in expected)
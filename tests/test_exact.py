@@ -0,0 +1,48 @@
+"""精确解：不可解的参数在枚举前或枚举过程中尽早抛出 ValueError。"""
+import pytest
+
+from agentsim import exact
+
+
+def _counting(monkeypatch):
+    calls = []
+    successors = exact._successors
+
+    def counted(chain, state, num_agents):
+        calls.append(state)
+        return successors(chain, state, num_agents)
+
+    monkeypatch.setattr(exact, "_successors", counted)
+    return calls
+
+
+def test_max_states_is_checked_while_a_round_is_built(monkeypatch):
+    # history N = 4 第 3 轮有 1594 个状态，第 4 轮约 1.5 万个：不必把第 4 轮算完就应该报错
+    calls = _counting(monkeypatch)
+    round3 = exact.expected_rounds("history", 4, max_rounds=3)["states"]
+    first_rounds = len(calls)
+    calls.clear()
+    with pytest.raises(ValueError, match="more than 2000 states at round 4"):
+        exact.expected_rounds("history", 4, max_rounds=30, max_states=2000)
+    assert len(calls) < first_rounds + round3
+
+
+def test_infinite_chains_are_rejected_before_enumeration(monkeypatch):
+    calls = _counting(monkeypatch)
+    for model, params in (("history", {}), ("history_withoutSignal", {}), ("reward", {}),
+                          ("reward_withoutSignal", {"alpha": 0.3, "beta": 0.3})):
+        with pytest.raises(ValueError):
+            exact.expected_rounds(model, 3, **params)
+    assert not calls
+
+
+def test_closed_and_truncated_solutions():
+    # N = 3、alpha = beta = 1 的 reward 链只有 42 个非吸收状态
+    closed = exact.expected_rounds("reward", 3, alpha=1, beta=1)
+    assert closed["states"] == 42
+    assert closed["mean"] == pytest.approx(5.2287, abs=1e-4)
+    # N = 2 时第一轮两个 agent 都投票，之后每轮两者一致的概率不为零
+    truncated = exact.expected_rounds("history_withoutSignal", 2, max_rounds=40)
+    assert truncated["survival"][0] == 1.0
+    assert 0 < truncated["censored"] < truncated["survival"][1] < 1
+    assert truncated["mean"] == pytest.approx(truncated["survival"][:40].sum())
@@ -0,0 +1,39 @@
+"""内置图生成器：没有孤立点，邻接表对称。"""
+import numpy as np
+import pytest
+
+from agentsim import graph
+
+
+@pytest.mark.parametrize("num_agents, m", [(2, 1), (10, 1), (100, 1), (1000, 1), (50, 2), (200, 3)])
+def test_scale_free_has_no_isolated_agents(num_agents, m):
+    for seed in range(100):
+        g = graph.scale_free(num_agents, m=m, seed=seed)
+        assert g.num_agents == num_agents
+        assert (g.degrees >= 1).all()
+        # 核心之外每个 agent 带来至多 m 条边
+        assert g.num_edges <= m * (m + 1) // 2 + (num_agents - m - 1) * m
+
+
+def test_scale_free_rejects_too_few_agents():
+    with pytest.raises(ValueError):
+        graph.scale_free(3, m=3)
+
+
+@pytest.mark.parametrize("make", [
+    lambda: graph.complete(8),
+    lambda: graph.ring_lattice(20, k=4),
+    lambda: graph.grid_lattice(4, 5),
+    lambda: graph.small_world(50, k=4, p=0.3, seed=0),
+    lambda: graph.scale_free(50, m=2, seed=0),
+])
+def test_adjacency_is_symmetric(make):
+    g = make()
+    pairs = {(int(i), int(j)) for i in range(g.num_agents) for j in g.neighbors(i)}
+    assert all((j, i) in pairs for i, j in pairs)
+    assert all(i != j for i, j in pairs)
+
+
+def test_isolated_agent_is_rejected():
+    with pytest.raises(ValueError):
+        graph.CSRGraph.from_edges(3, np.array([[0, 1]]))
@@ -0,0 +1,41 @@
+"""参数网格：网格点 p 的第 r 个重复实验与用该组参数单独运行的第 r 个重复实验逐位一致。"""
+import numpy as np
+import pytest
+
+from agentsim import grid
+from agentsim.adaptive import censored_summary
+from agentsim.batch import run_batch
+from agentsim.models import get_model
+
+RUNS = 20
+
+
+@pytest.mark.parametrize("name, points", [
+    ("reward", [{"alpha": 0.3, "beta": 0.5}, {"alpha": 0.8, "beta": 0.5}]),
+    ("history", [{"pseudo_count": 1.0}, {"pseudo_count": 3.0}]),
+])
+def test_grid_points_match_standalone_runs(name, points):
+    # 两个网格点 × 20 次重复实验共 40 行：先向量化推进，再按行取参数交给标量循环
+    rounds = grid._run_shard((name, 6, points, RUNS, 3000, 4))
+    for point, point_rounds in zip(points, rounds):
+        expected, _ = run_batch(get_model(name, **point), 6, RUNS, max_rounds=3000, seed=4)
+        np.testing.assert_array_equal(point_rounds, expected)
+
+
+def test_grid_sweep_rows():
+    rows = grid.grid_sweep("reward", [4, 6], runs=RUNS, max_rounds=3000, seed=4, max_rows=RUNS,
+                           alpha=[0.3, 0.8], beta=[0.5])
+    assert [(row["alpha"], row["beta"], row["n"]) for row in rows] == \
+        [(0.3, 0.5, 4), (0.8, 0.5, 4), (0.3, 0.5, 6), (0.8, 0.5, 6)]
+    for row in rows:
+        expected, _ = run_batch(get_model("reward", alpha=row["alpha"], beta=row["beta"]), row["n"], RUNS,
+                                max_rounds=3000, seed=4)
+        summary = censored_summary(expected, 3000)
+        assert (row["runs"], row["censored"], row["mean"], row["median"]) == \
+            (RUNS, summary["censored"], summary["mean"], summary["median"])
+        assert row["std"] == float(expected.std(ddof=1))
+
+
+def test_unknown_parameter_is_rejected():
+    with pytest.raises(ValueError):
+        grid.grid_sweep("history", [4], alpha=[0.5])
@@ -0,0 +1,136 @@
+"""工作队列往返：提交、计算、合并的结果与单机批量运行相同。"""
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from agentsim import checkpoint, workqueue
+from agentsim.adaptive import censored_summary
+from agentsim.batch import run_batch
+
+
+def test_round_trip_matches_batch(tmp_path):
+    root = str(tmp_path)
+    seed, added = workqueue.submit(root, "reward", [4, 6], runs_per_size=7, max_rounds=2000, seed=5,
+                                   shard_runs=3)
+    assert added == 6
+    # 重复提交不会加入已有的分片
+    assert workqueue.submit(root, "reward", [4, 6], runs_per_size=7, max_rounds=2000, seed=5,
+                            shard_runs=3)[1] == 0
+    with pytest.raises(ValueError):
+        workqueue.merge(root)
+
+    assert workqueue.work(root, poll=0) == 6
+    assert workqueue.status(root) == {"todo": 0, "leases": 0, "done": 6, "failed": 0}
+    rows = workqueue.merge(root)
+    assert [row["n"] for row in rows] == [4, 6]
+    for row in rows:
+        rounds, _ = run_batch("reward", row["n"], 7, max_rounds=2000, seed=seed)
+        summary = censored_summary(rounds, 2000)
+        assert row["runs"] == 7
+        assert row["mean"] == summary["mean"]
+        assert row["median"] == summary["median"]
+
+
+def test_shard_results_are_bit_identical(tmp_path):
+    root = str(tmp_path)
+    workqueue.submit(root, "history", [6], runs_per_size=4, max_rounds=3000, seed=1, shard_runs=2)
+    workqueue.work(root, poll=0)
+    rounds = np.concatenate([checkpoint.load(workqueue._path(root, "done", shard))[1]["rounds"]
+                             for shard in workqueue._list(root, "done")])
+    expected, _ = run_batch("history", 6, 4, max_rounds=3000, seed=1)
+    np.testing.assert_array_equal(rounds, expected)
+
+
+def _age(root, state, seconds):
+    # 模拟在队列中等待了很久的分片
+    for shard in workqueue._list(root, state):
+        path = workqueue._path(root, state, shard)
+        old = os.path.getmtime(path) - seconds
+        os.utime(path, (old, old))
+
+
+def test_claim_refreshes_lease_of_long_queued_shard(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    workqueue.submit(root, "reward", [4], runs_per_size=2, max_rounds=1000, seed=0, shard_runs=2)
+    _age(root, "todo", 3600)
+    read = workqueue._read_json
+
+    def read_after_requeue(path):
+        # 另一个 worker 在 rename 与读取之间回收超时的租约
+        workqueue.requeue_expired(root, lease_timeout=600)
+        return read(path)
+
+    monkeypatch.setattr(workqueue, "_read_json", read_after_requeue)
+    shard_id, spec = workqueue._claim(root, "w1")
+    assert shard_id is not None and spec["attempts"] == 1
+    assert workqueue.status(root)["leases"] == 1
+
+
+def test_claim_skips_shard_lost_to_another_worker(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    workqueue.submit(root, "reward", [4], runs_per_size=2, max_rounds=1000, seed=0, shard_runs=2)
+    read = workqueue._read_json
+
+    def read_after_steal(path):
+        # 租约在读取之前被移走
+        os.rename(path, path + ".gone")
+        return read(path)
+
+    monkeypatch.setattr(workqueue, "_read_json", read_after_steal)
+    assert workqueue._claim(root, "w1") == (None, None)
+
+
+def _lease_holder(root, pid):
+    # 由 pid 的 worker 持有的分片，没有时返回 None
+    for shard in workqueue._list(root, "leases"):
+        try:
+            spec = workqueue._read_json(workqueue._path(root, "leases", shard))
+        except (FileNotFoundError, ValueError):
+            continue
+        if spec.get("worker", "").endswith(f":{pid}"):
+            return shard
+    return None
+
+
+def test_killed_worker_shard_is_retried_by_other_processes(tmp_path):
+    root = str(tmp_path)
+    seed, added = workqueue.submit(root, "history", [20], runs_per_size=12, max_rounds=100000, seed=2,
+                                   shard_runs=4)
+    assert added == 3
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # 固定用纯 Python 后端，每个分片要算零点几秒，足够在它持有租约时杀掉它
+    env = dict(os.environ, AGENTSIM_BACKEND="python")
+    command = [sys.executable, "-m", "agentsim.workqueue", "work", root, "--lease-timeout", "2", "--poll", "0.1"]
+
+    victim = subprocess.Popen(command, cwd=repo, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    shard = None
+    while shard is None and time.monotonic() < deadline and victim.poll() is None:
+        shard = _lease_holder(root, victim.pid)
+        time.sleep(0.01)
+    victim.kill()
+    victim.wait()
+    assert shard is not None
+    assert os.path.exists(workqueue._path(root, "leases", shard))
+
+    workers = [subprocess.Popen(command, cwd=repo, env=env, stdout=subprocess.DEVNULL) for _ in range(2)]
+    for worker in workers:
+        assert worker.wait(timeout=120) == 0
+    assert workqueue.status(root) == {"todo": 0, "leases": 0, "done": 3, "failed": 0}
+    # 被杀掉的 worker 领过一次，接手的 worker 又领了一次
+    meta, _ = checkpoint.load(workqueue._path(root, "done", shard))
+    assert meta["shard"]["attempts"] == 2
+
+    rows = workqueue.merge(root)
+    rounds, _ = run_batch("history", 20, 12, max_rounds=100000, seed=seed)
+    summary = censored_summary(rounds, 100000)
+    assert len(rows) == 1
+    assert (rows[0]["runs"], rows[0]["censored"], rows[0]["mean"], rows[0]["median"]) == \
+        (12, summary["censored"], summary["mean"], summary["median"])
+    merged = np.concatenate([checkpoint.load(workqueue._path(root, "done", s))[1]["rounds"]
+                             for s in workqueue._list(root, "done")])
+    np.testing.assert_array_equal(merged, rounds)